@@ -0,0 +1,107 @@
+import random
+import sys
+import time
+import tracemalloc
+
+from logic import (
+    BDD, KnowledgeBase, entails, model_check, parallel_model_check
+)
+from puzzle import generate_puzzle
+
+# Stop running a backend once one puzzle takes longer than this
+TIME_BUDGET = 5
+
+# Small puzzles checked in parallel before timing, many of whose
+# queries have counter-models and so stop their pool early
+PARALLEL_ROUNDS = 100
+PARALLEL_CHARACTERS = 3
+
+
+def check_each(check):
+    """Returns a backend asking `check(knowledge, symbol)` per symbol."""
+    return lambda knowledge, symbols: [
+        check(knowledge, symbol) for symbol in symbols
+    ]
+
+
+def bdd_check(knowledge, symbols):
+    """Compiles the knowledge once and asks every symbol."""
+    bdd = BDD(knowledge)
+    return [bdd.entails(symbol) for symbol in symbols]
+
+
+def knowledge_base_check(knowledge, symbols):
+    """Asks every symbol against one incremental knowledge base."""
+    return KnowledgeBase(knowledge).ask_all(symbols)
+
+
+BACKENDS = {
+    "model_check": check_each(model_check),
+    "parallel_model_check": check_each(parallel_model_check),
+    "entails": check_each(entails),
+    "KnowledgeBase": knowledge_base_check,
+    "BDD": bdd_check,
+}
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python benchmark.py max_characters [seed]")
+    max_characters = int(sys.argv[1])
+    seed = int(sys.argv[2]) if len(sys.argv) == 3 else 0
+    rng = random.Random(seed)
+
+    check_parallel(rng)
+    print(f"{'n':>4}  {'backend':<22}{'seconds':>10}{'peak KiB':>12}")
+    active = set(BACKENDS)
+    for n in range(1, max_characters + 1):
+        knowledge, symbols = generate_puzzle(n, rng)
+        answers = dict()
+        for name, backend in BACKENDS.items():
+            if name not in active:
+                continue
+            seconds, peak, answers[name] = measure(backend, knowledge, symbols)
+            print(f"{n:>4}  {name:<22}{seconds:>10.4f}{peak / 1024:>12.1f}")
+            if seconds > TIME_BUDGET:
+                active.remove(name)
+
+        # Every backend must reach the same conclusions
+        if len(set(map(tuple, answers.values()))) > 1:
+            sys.exit(f"Backends disagree on puzzle with {n} characters")
+
+
+def check_parallel(rng, rounds=PARALLEL_ROUNDS):
+    """
+    Checks that parallel_model_check agrees with model_check, calling it
+    over and over with several shards per worker.
+    """
+    for _ in range(rounds):
+        knowledge, symbols = generate_puzzle(PARALLEL_CHARACTERS, rng)
+        for symbol in symbols:
+            entailed = parallel_model_check(
+                knowledge, symbol, shard_symbols=2, processes=2
+            )
+            if entailed != model_check(knowledge, symbol):
+                sys.exit(f"parallel_model_check is wrong about {symbol}")
+    print(f"parallel_model_check agrees on {rounds} puzzles")
+
+
+def measure(backend, knowledge, symbols):
+    """
+    Returns wall time, peak traced memory in bytes and answers for
+    one backend on one puzzle. Time and memory come from separate runs,
+    since tracing allocations slows the code down.
+    """
+    start = time.perf_counter()
+    answers = backend(knowledge, symbols)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    backend(knowledge, symbols)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, answers
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
 import itertools
+import math
+import multiprocessing
+import os
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 
 class Sentence():
@@ -7,6 +12,14 @@ class Sentence():
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may leave some
+        symbols unassigned. Returns True or False if every completion of
+        the model agrees on the value, and None if the value is unknown.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
@@ -62,6 +75,10 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
@@ -86,6 +103,10 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
@@ -120,6 +141,16 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
@@ -151,6 +182,16 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
@@ -183,6 +224,17 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is None or consequent is None:
+            return None
+        return False
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
@@ -216,6 +268,15 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
@@ -225,39 +286,782 @@ class Biconditional(Sentence):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+def symbol_frequencies(sentence, counts=None):
+    """Returns a dict mapping each symbol to its number of occurrences."""
+    if counts is None:
+        counts = dict()
+    if isinstance(sentence, Symbol):
+        counts[sentence.name] = counts.get(sentence.name, 0) + 1
+    elif isinstance(sentence, Not):
+        symbol_frequencies(sentence.operand, counts)
+    elif isinstance(sentence, And):
+        for conjunct in sentence.conjuncts:
+            symbol_frequencies(conjunct, counts)
+    elif isinstance(sentence, Or):
+        for disjunct in sentence.disjuncts:
+            symbol_frequencies(disjunct, counts)
+    elif isinstance(sentence, Implication):
+        symbol_frequencies(sentence.antecedent, counts)
+        symbol_frequencies(sentence.consequent, counts)
+    elif isinstance(sentence, Biconditional):
+        symbol_frequencies(sentence.left, counts)
+        symbol_frequencies(sentence.right, counts)
+    return counts
+
+
+def order_symbols(knowledge, query):
+    """
+    Returns all symbols in knowledge and query as a list,
+    most frequently occurring first.
+    """
+    counts = symbol_frequencies(knowledge)
+    symbol_frequencies(query, counts)
+    return sorted(counts, key=lambda symbol: (-counts[symbol], symbol))
+
+
+def check_all(knowledge, query, symbols, model, stop=None):
+    """
+    Checks if knowledge base entails query, given a particular model.
+
+    `symbols` is the list of unassigned symbols, in the order they should
+    be branched on. Subtrees whose outcome is already decided by the
+    partial model are pruned without being enumerated. Once the event
+    `stop` is set, the search gives up and its answer is meaningless.
+    """
+
+    # Another worker has already found the answer
+    if stop is not None and stop.is_set():
+        return True
+
+    # If knowledge base is false in every completion, nothing to check
+    kb = knowledge.evaluate_partial(model)
+    if kb is False:
+        return True
+
+    # If query is true in every completion, entailment holds here
+    q = query.evaluate_partial(model)
+    if q is True:
+        return True
+
+    # If knowledge base is true but query false, this is a counter-model
+    if kb is True and q is False:
+        return False
+
+    # Choose the next unused symbol
+    p = symbols[0]
+    remaining = symbols[1:]
+
+    # Create a model where the symbol is true
+    model_true = model.copy()
+    model_true[p] = True
+
+    # Create a model where the symbol is false
+    model_false = model.copy()
+    model_false[p] = False
+
+    # Ensure entailment holds in both models
+    return (check_all(knowledge, query, remaining, model_true, stop) and
+            check_all(knowledge, query, remaining, model_false, stop))
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
 
-        # If model has an assignment for each symbol
-        if not symbols:
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query."""
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
+    # Get all symbols in both knowledge and query
+    symbols = order_symbols(knowledge, query)
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+    # Check that knowledge entails query
+    return check_all(knowledge, query, symbols, dict())
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+# Set in every worker once any shard has found a counter-model
+stop_event = None
+
+
+def init_checker(stop):
+    global stop_event
+    stop_event = stop
+
+
+def check_shard(knowledge, query, symbols, model):
+    """Checks entailment for one partial model; runs in a worker process."""
+    return check_all(knowledge, query, symbols, model, stop_event)
+
+
+def parallel_model_check(knowledge, query, shard_symbols=None, processes=None):
+    """
+    Checks if knowledge base entails query, splitting the enumeration
+    across a process pool.
+
+    The first `shard_symbols` symbols are fixed in every combination,
+    and each of the resulting 2^k partial models is checked by a worker.
+    As soon as one shard finds a counter-model, shards not yet started
+    are cancelled and running ones are told to stop.
+    """
+    symbols = order_symbols(knowledge, query)
+    processes = processes or os.cpu_count() or 1
+
+    # By default, make a few shards per worker so the load stays balanced
+    if shard_symbols is None:
+        shard_symbols = math.ceil(math.log2(processes * 4))
+    shard_symbols = max(0, min(shard_symbols, len(symbols)))
+    fixed = symbols[:shard_symbols]
+    remaining = symbols[shard_symbols:]
+
+    # Not worth starting processes for a single shard
+    if shard_symbols == 0 or processes == 1:
+        return check_all(knowledge, query, symbols, dict())
+
+    shards = [
+        dict(zip(fixed, values))
+        for values in itertools.product((True, False), repeat=len(fixed))
+    ]
+    stop = multiprocessing.Event()
+    executor = ProcessPoolExecutor(
+        processes, initializer=init_checker, initargs=(stop,)
+    )
+    try:
+        futures = [
+            executor.submit(check_shard, knowledge, query, remaining, model)
+            for model in shards
+        ]
+        for future in as_completed(futures):
+            if not future.result():
+                stop.set()
+                return False
+    finally:
+        executor.shutdown(cancel_futures=True)
+    return True
+
+
+def propagate(clauses, model):
+    """
+    Repeatedly assigns literals forced by unit clauses.
+
+    Clauses are collections of (variable, value) literals. Returns the
+    clauses that are still undecided (with assigned literals removed)
+    together with the extended model, or None if a clause is violated.
+    """
+    model = dict(model)
+    while True:
+        remaining = []
+        units = []
+        for clause in clauses:
+            undecided = []
+            for variable, value in clause:
+                if variable in model:
+                    if model[variable] == value:
+                        break
+                else:
+                    undecided.append((variable, value))
+            else:
+                if not undecided:
+                    return None
+                if len(undecided) == 1:
+                    units.append(undecided[0])
+                remaining.append(undecided)
+        if not units:
+            return remaining, model
+        for variable, value in units:
+            if model.get(variable, value) != value:
+                return None
+            model[variable] = value
+        clauses = remaining
+
+
+def solve(clauses, model):
+    """
+    Returns a model satisfying all clauses that extends `model`,
+    or None if no such model exists.
+    """
+    result = propagate(clauses, model)
+    if result is None:
+        return None
+    clauses, model = result
+    if not clauses:
+        return model
+
+    # Branch on a literal from the shortest undecided clause
+    variable, value = min(clauses, key=len)[0]
+    for choice in (value, not value):
+        found = solve(clauses, {**model, variable: choice})
+        if found is not None:
+            return found
+    return None
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that answers many entailment queries incrementally.
+
+    Sentences are compiled once into clauses, with an auxiliary variable
+    standing for each compound subsentence. Facts forced by the clauses,
+    models found while answering queries, and the answers themselves are
+    kept between calls, so later queries can often be answered without
+    searching again.
+    """
+
+    def __init__(self, *sentences):
+        self.sentences = []
+        self.clauses = []
+
+        # Variable standing for each sentence that has been compiled
+        self.literals = dict()
+        self.auxiliaries = 0
+
+        # Symbol values entailed by the knowledge base
+        self.facts = dict()
+
+        # Models of the knowledge base found so far
+        self.models = []
+
+        # Entailment results for previously asked queries
+        self.cache = dict()
+
+        # Whether the knowledge base has no models at all
+        self.inconsistent = False
+
+        for sentence in sentences:
+            self.tell(sentence)
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+    def __repr__(self):
+        return f"KnowledgeBase({', '.join(str(s) for s in self.sentences)})"
+
+    def literal(self, sentence):
+        """
+        Returns a (variable, value) literal equivalent to `sentence`,
+        adding clauses defining any auxiliary variables it needs.
+        """
+        if isinstance(sentence, Symbol):
+            return (sentence.name, True)
+        if isinstance(sentence, Not):
+            variable, value = self.literal(sentence.operand)
+            return (variable, not value)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        self.auxiliaries += 1
+        x = (("aux", self.auxiliaries), True)
+        nx = (x[0], False)
+
+        def negate(literal):
+            return (literal[0], not literal[1])
+
+        if isinstance(sentence, And):
+            parts = [self.literal(c) for c in sentence.conjuncts]
+            self.clauses.extend([nx, part] for part in parts)
+            self.clauses.append([x] + [negate(part) for part in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(d) for d in sentence.disjuncts]
+            self.clauses.extend([x, negate(part)] for part in parts)
+            self.clauses.append([nx] + parts)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            self.clauses.extend([
+                [nx, negate(a), b], [x, a], [x, negate(b)]
+            ])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            self.clauses.extend([
+                [nx, negate(a), b], [nx, a, negate(b)],
+                [x, a, b], [x, negate(a), negate(b)]
+            ])
+        else:
+            raise TypeError(f"cannot compile {sentence!r}")
+
+        self.literals[sentence] = x
+        return x
+
+    def tell(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        self.clauses.append([self.literal(sentence)])
+
+        # Entailment is monotonic: only positive answers remain valid
+        self.cache = {
+            query: entailed for query, entailed in self.cache.items()
+            if entailed
+        }
+        self.models = [
+            model for model in self.models
+            if sentence.evaluate_partial(model) is True
+        ]
+
+        # Learn the facts forced by unit propagation
+        result = propagate(self.clauses, self.facts)
+        if result is None:
+            self.inconsistent = True
+            return
+        _, model = result
+        self.facts = {
+            variable: value for variable, value in model.items()
+            if isinstance(variable, str)
+        }
+
+    def ask(self, query):
+        """Checks if the knowledge base entails query."""
+        Sentence.validate(query)
+        if query in self.cache:
+            return self.cache[query]
+        entailed = self.entails(query)
+        self.cache[query] = entailed
+        if entailed and isinstance(query, (Symbol, Not)):
+            variable, value = self.literal(query)
+            self.facts[variable] = value
+        return entailed
+
+    def ask_all(self, queries):
+        """Returns a list with the answer to `ask` for each query."""
+        return [self.ask(query) for query in queries]
+
+    def entails(self, query):
+        """Checks entailment without consulting the result cache."""
+        if self.inconsistent:
+            return True
 
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+        # Facts hold in every model, so they may decide the query
+        decided = query.evaluate_partial(self.facts)
+        if decided is True:
+            return True
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+        # Anything is entailed by a knowledge base without models
+        if not self.models:
+            model = solve(self.clauses, self.facts)
+            if model is None:
+                self.inconsistent = True
+                return True
+            self.remember(model)
+        if decided is False:
+            return False
+
+        # A known model where the query is false is a counter-model
+        for model in self.models:
+            if query.evaluate_partial(model) is False:
+                return False
+
+        # Otherwise look for a model of the knowledge base and ¬query
+        variable, value = self.literal(query)
+        model = solve(
+            self.clauses + [[(variable, not value)]], self.facts
+        )
+        if model is None:
+            return True
+        self.remember(model)
+        return False
+
+    def remember(self, model):
+        """Keeps the symbol assignments of a model for later queries."""
+        self.models.append({
+            variable: value for variable, value in model.items()
+            if isinstance(variable, str)
+        })
+
+
+def first_occurrence_order(sentence, order=None):
+    """
+    Returns the symbols of a sentence in the order a depth-first walk
+    first meets them. Symbols used in the same subsentence stay close
+    together, which usually keeps the decision diagram small.
+    """
+    if order is None:
+        order = dict()
+    if isinstance(sentence, Symbol):
+        order.setdefault(sentence.name, len(order))
+    elif isinstance(sentence, Not):
+        first_occurrence_order(sentence.operand, order)
+    elif isinstance(sentence, And):
+        for conjunct in sentence.conjuncts:
+            first_occurrence_order(conjunct, order)
+    elif isinstance(sentence, Or):
+        for disjunct in sentence.disjuncts:
+            first_occurrence_order(disjunct, order)
+    elif isinstance(sentence, Implication):
+        first_occurrence_order(sentence.antecedent, order)
+        first_occurrence_order(sentence.consequent, order)
+    elif isinstance(sentence, Biconditional):
+        first_occurrence_order(sentence.left, order)
+        first_occurrence_order(sentence.right, order)
+    return list(order)
+
+
+class BDD():
+    """
+    Knowledge base compiled into a reduced ordered binary decision diagram.
+
+    Nodes are integers: 0 and 1 are the false and true terminals, and
+    every other node is a (level, low, high) triple stored once in a
+    shared unique table. Compilation is slow, but afterwards entailment,
+    satisfiability and model counting take time linear in the diagram.
+    """
+
+    FALSE = 0
+    TRUE = 1
+
+    OPERATIONS = {
+        "and": lambda a, b: a and b,
+        "or": lambda a, b: a or b,
+        "implies": lambda a, b: (not a) or b,
+        "iff": lambda a, b: a == b,
+    }
+
+    def __init__(self, knowledge, order=None):
+        Sentence.validate(knowledge)
+        if order is None:
+            order = first_occurrence_order(knowledge)
+        self.order = list(order)
+        self.levels = {name: level for level, name in enumerate(self.order)}
+
+        # Terminals sit below every variable
+        self.nodes = [(math.inf, None, None), (math.inf, None, None)]
+        self.unique = dict()
+        self.apply_cache = dict()
+        self.not_cache = dict()
+        self.compiled = dict()
+        self.entailed = dict()
+
+        self.symbols = knowledge.symbols()
+        for name in sorted(self.symbols - set(self.levels)):
+            self.add_variable(name)
+        self.num_variables = len(self.order)
+        self.root = self.compile(knowledge)
+
+    def __len__(self):
+        """Returns the number of nodes reachable from the root."""
+        seen = set()
+        stack = [self.root]
+        while stack:
+            u = stack.pop()
+            if u in seen:
+                continue
+            seen.add(u)
+            if u > BDD.TRUE:
+                _, low, high = self.nodes[u]
+                stack.extend((low, high))
+        return len(seen)
+
+    def add_variable(self, name):
+        """Appends a variable below all existing ones in the order."""
+        self.levels[name] = len(self.order)
+        self.order.append(name)
+
+    def node(self, level, low, high):
+        """Returns the unique node for (level, low, high)."""
+        if low == high:
+            return low
+        key = (level, low, high)
+        u = self.unique.get(key)
+        if u is None:
+            u = len(self.nodes)
+            self.nodes.append(key)
+            self.unique[key] = u
+        return u
+
+    def negate(self, u):
+        """Returns the node for the negation of node u."""
+        if u <= BDD.TRUE:
+            return 1 - u
+        if u not in self.not_cache:
+            level, low, high = self.nodes[u]
+            self.not_cache[u] = self.node(
+                level, self.negate(low), self.negate(high)
+            )
+        return self.not_cache[u]
+
+    def apply(self, op, u, v):
+        """Combines nodes u and v with a binary operation from OPERATIONS."""
+        if u <= BDD.TRUE and v <= BDD.TRUE:
+            return int(BDD.OPERATIONS[op](bool(u), bool(v)))
+
+        # Shortcuts that avoid walking the other operand
+        if op == "and":
+            if u == BDD.FALSE or v == BDD.FALSE:
+                return BDD.FALSE
+            if u == BDD.TRUE or u == v:
+                return v
+            if v == BDD.TRUE:
+                return u
+        elif op == "or":
+            if u == BDD.TRUE or v == BDD.TRUE:
+                return BDD.TRUE
+            if u == BDD.FALSE or u == v:
+                return v
+            if v == BDD.FALSE:
+                return u
+
+        key = (op, u, v)
+        if key in self.apply_cache:
+            return self.apply_cache[key]
+
+        # Expand on the topmost variable of the two operands
+        u_level, u_low, u_high = self.nodes[u]
+        v_level, v_low, v_high = self.nodes[v]
+        level = min(u_level, v_level)
+        if u_level != level:
+            u_low = u_high = u
+        if v_level != level:
+            v_low = v_high = v
+        result = self.node(
+            level,
+            self.apply(op, u_low, v_low),
+            self.apply(op, u_high, v_high)
+        )
+        self.apply_cache[key] = result
+        return result
+
+    def compile(self, sentence):
+        """Returns the node representing a sentence."""
+        if sentence in self.compiled:
+            return self.compiled[sentence]
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.levels:
+                self.add_variable(sentence.name)
+            u = self.node(
+                self.levels[sentence.name], BDD.FALSE, BDD.TRUE
+            )
+        elif isinstance(sentence, Not):
+            u = self.negate(self.compile(sentence.operand))
+        elif isinstance(sentence, And):
+            u = BDD.TRUE
+            for conjunct in sentence.conjuncts:
+                u = self.apply("and", u, self.compile(conjunct))
+        elif isinstance(sentence, Or):
+            u = BDD.FALSE
+            for disjunct in sentence.disjuncts:
+                u = self.apply("or", u, self.compile(disjunct))
+        elif isinstance(sentence, Implication):
+            u = self.apply(
+                "implies",
+                self.compile(sentence.antecedent),
+                self.compile(sentence.consequent)
+            )
+        elif isinstance(sentence, Biconditional):
+            u = self.apply(
+                "iff",
+                self.compile(sentence.left),
+                self.compile(sentence.right)
+            )
+        else:
+            raise TypeError(f"cannot compile {sentence!r}")
+        self.compiled[sentence] = u
+        return u
+
+    def restrict(self, u, level, value, cache=None):
+        """Returns node u with the variable at `level` fixed to `value`."""
+        if cache is None:
+            cache = dict()
+        u_level, low, high = self.nodes[u]
+        if u_level > level:
+            return u
+        if u_level == level:
+            return high if value else low
+        if u not in cache:
+            cache[u] = self.node(
+                u_level,
+                self.restrict(low, level, value, cache),
+                self.restrict(high, level, value, cache)
+            )
+        return cache[u]
+
+    def satisfiable(self):
+        """Checks if the knowledge base has at least one model."""
+        return self.root != BDD.FALSE
+
+    def model(self):
+        """Returns one model of the knowledge base, or None."""
+        if not self.satisfiable():
+            return None
+        model = dict()
+        u = self.root
+        while u > BDD.TRUE:
+            level, low, high = self.nodes[u]
+            value = high != BDD.FALSE
+            model[self.order[level]] = value
+            u = high if value else low
+        for name in self.symbols:
+            model.setdefault(name, False)
+        return model
+
+    def count_models(self):
+        """Returns the number of models over the knowledge base's symbols."""
+        counts = {BDD.FALSE: 0, BDD.TRUE: 1}
+
+        def level(u):
+            return min(self.nodes[u][0], self.num_variables)
+
+        def count(u):
+            if u not in counts:
+                u_level, low, high = self.nodes[u]
+                counts[u] = (
+                    count(low) * 2 ** (level(low) - u_level - 1)
+                    + count(high) * 2 ** (level(high) - u_level - 1)
+                )
+            return counts[u]
+
+        return count(self.root) * 2 ** level(self.root)
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        Sentence.validate(query)
+        if query in self.entailed:
+            return self.entailed[query]
+
+        # Literals only need one linear pass over the diagram
+        literal = query
+        value = True
+        if isinstance(literal, Not):
+            literal = literal.operand
+            value = False
+        if isinstance(literal, Symbol):
+            if literal.name not in self.levels:
+                entailed = not self.satisfiable()
+            else:
+                counter = self.restrict(
+                    self.root, self.levels[literal.name], not value
+                )
+                entailed = counter == BDD.FALSE
+        else:
+            counter = self.apply(
+                "and", self.root, self.negate(self.compile(query))
+            )
+            entailed = counter == BDD.FALSE
+
+        self.entailed[query] = entailed
+        return entailed
+
+
+def disjoin(left, right, limit):
+    """
+    Returns the clauses of the disjunction of two clause lists,
+    or None if there would be more than `limit` of them.
+    """
+    if left is None or right is None:
+        return None
+    clauses = []
+    for a in left:
+        for b in right:
+            clause = a | b
+
+            # Drop clauses containing both a literal and its negation
+            if any((variable, not value) in clause
+                   for variable, value in clause):
+                continue
+            clauses.append(clause)
+            if len(clauses) > limit:
+                return None
+    return clauses
+
+
+def to_cnf(sentence, negate=False, limit=1000):
+    """
+    Returns the sentence (or its negation) in conjunctive normal form,
+    as a list of frozensets of (symbol, value) literals. Returns None
+    if the conversion would produce more than `limit` clauses.
+    """
+    def conjoin(*parts):
+        if any(part is None for part in parts):
+            return None
+        clauses = [clause for part in parts for clause in part]
+        return clauses if len(clauses) <= limit else None
+
+    def disjoin_all(parts):
+        clauses = [frozenset()]
+        for part in parts:
+            clauses = disjoin(clauses, part, limit)
+        return clauses
+
+    def cnf(sentence, negate):
+        return to_cnf(sentence, negate, limit)
+
+    if isinstance(sentence, Symbol):
+        return [frozenset({(sentence.name, not negate)})]
+    if isinstance(sentence, Not):
+        return cnf(sentence.operand, not negate)
+    if isinstance(sentence, And):
+        parts = [cnf(c, negate) for c in sentence.conjuncts]
+        return disjoin_all(parts) if negate else conjoin(*parts)
+    if isinstance(sentence, Or):
+        parts = [cnf(d, negate) for d in sentence.disjuncts]
+        return conjoin(*parts) if negate else disjoin_all(parts)
+    if isinstance(sentence, Implication):
+        a, b = sentence.antecedent, sentence.consequent
+        if negate:
+            return conjoin(cnf(a, False), cnf(b, True))
+        return disjoin(cnf(a, True), cnf(b, False), limit)
+    if isinstance(sentence, Biconditional):
+        a, b = sentence.left, sentence.right
+        return conjoin(
+            disjoin(cnf(a, not negate), cnf(b, False), limit),
+            disjoin(cnf(a, negate), cnf(b, True), limit)
+        )
+    raise TypeError(f"cannot convert {sentence!r}")
+
+
+def horn_clauses(sentence):
+    """
+    Returns the sentence as a list of (premises, conclusion) rules if it
+    is equivalent to a conjunction of Horn clauses, otherwise None.
+    `premises` is a frozenset of symbols and `conclusion` is a symbol,
+    or None for clauses that only forbid their premises all being true.
+    """
+    clauses = to_cnf(sentence)
+    if clauses is None:
+        return None
+    rules = []
+    for clause in clauses:
+        positive = [variable for variable, value in clause if value]
+        if len(positive) > 1:
+            return None
+        premises = frozenset(
+            variable for variable, value in clause if not value
+        )
+        rules.append((premises, positive[0] if positive else None))
+    return rules
+
+
+def forward_chain(rules):
+    """
+    Runs forward chaining over Horn rules in time linear in their size.
+
+    Returns the set of symbols that are entailed, or None if the rules
+    are contradictory.
+    """
+    # Number of premises of each rule not yet known to be true
+    count = [len(premises) for premises, _ in rules]
+
+    # Rules waiting on each symbol
+    waiting = dict()
+    for i, (premises, _) in enumerate(rules):
+        for symbol in premises:
+            waiting.setdefault(symbol, []).append(i)
+
+    inferred = set()
+    agenda = [conclusion for premises, conclusion in rules if not premises]
+    while agenda:
+        symbol = agenda.pop()
+        if symbol is None:
+            return None
+        if symbol in inferred:
+            continue
+        inferred.add(symbol)
+        for i in waiting.get(symbol, ()):
+            count[i] -= 1
+            if count[i] == 0:
+                agenda.append(rules[i][1])
+    return inferred
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, using forward chaining when
+    the knowledge base and the negated query are Horn, and falling back
+    to model checking otherwise.
+    """
+    rules = horn_clauses(knowledge)
+    if rules is not None:
+        negated = horn_clauses(Not(query))
+        if negated is not None:
+            return forward_chain(rules + negated) is None
+    return model_check(knowledge, query)
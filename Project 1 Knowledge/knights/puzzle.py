@@ -1,3 +1,5 @@
+import random
+
 from logic import *
 
 AKnight = Symbol("A is a Knight")
@@ -81,6 +83,46 @@ knowledge3 = And(
 )
 
 
+def generate_puzzle(n, rng=random):
+    """
+    Returns a random knights-and-knaves puzzle with n characters,
+    as a tuple (knowledge, symbols). Each character makes one random
+    statement about themselves or the others.
+    """
+    names = [chr(ord("A") + i) if i < 26 else f"P{i}" for i in range(n)]
+    knights = [Symbol(f"{name} is a Knight") for name in names]
+    knaves = [Symbol(f"{name} is a Knave") for name in names]
+
+    def kind(i):
+        return rng.choice([knights[i], knaves[i]])
+
+    knowledge = And()
+    for i in range(n):
+
+        # Every character is either a knight or a knave, not both
+        knowledge.add(Or(knights[i], knaves[i]))
+        knowledge.add(Not(And(knights[i], knaves[i])))
+
+        # Pick who the statement is about
+        x = rng.randrange(n)
+        y = rng.randrange(n)
+        statement = rng.choice([
+            lambda: kind(x),
+            lambda: Or(
+                And(knights[x], knights[y]), And(knaves[x], knaves[y])
+            ),
+            lambda: Or(knaves[x], knaves[y]),
+            lambda: Implication(kind(x), kind(y)),
+            lambda: And(kind(x), kind(y)),
+        ])()
+
+        # If the speaker is a knight then the statement is true, vice versa
+        knowledge.add(Biconditional(knights[i], statement))
+
+    symbols = [symbol for pair in zip(knights, knaves) for symbol in pair]
+    return knowledge, symbols
+
+
 def main():
     symbols = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
     puzzles = [
@@ -95,8 +137,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
+            kb = KnowledgeBase(knowledge)
+            for symbol, entailed in zip(symbols, kb.ask_all(symbols)):
+                if entailed:
                     print(f"    {symbol}")
 
 
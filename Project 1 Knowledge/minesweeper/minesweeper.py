@@ -1,34 +1,58 @@
 import itertools
+import math
+import os
 import random
 
+from concurrent.futures import ProcessPoolExecutor
+
+# NumPy is only needed for the array-backed board
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Components with more cells than this are sampled instead of enumerated
+ENUMERATION_LIMIT = 24
+
+# Number of random assignments drawn for a sampled component
+SAMPLES = 2000
+
+# Components at least this large are solved in worker processes
+PARALLEL_CELLS = 16
+
 
 class Minesweeper():
     """
     Minesweeper game representation
     """
 
-    def __init__(self, height=8, width=8, mines=8):
+    def __init__(self, height=8, width=8, mines=8, use_numpy=False):
 
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
         self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
+        # Pick mines at a random sample of distinct cells
+        indices = random.sample(range(height * width), mines)
+        self.mines.update(divmod(index, width) for index in indices)
+
+        if use_numpy:
+            if np is None:
+                raise ImportError("use_numpy requires NumPy")
+
+            # Boolean mine grid, and the number of adjacent mines for
+            # every cell, computed once for the whole board
+            self.board = np.zeros((height, width), dtype=bool)
+            self.board.flat[indices] = True
+            self.counts = neighbor_counts(self.board)
+        else:
+
+            # Initialize an empty field, then add the mines
+            self.board = [[False] * self.width for _ in range(self.height)]
+            for i, j in self.mines:
                 self.board[i][j] = True
+            self.counts = None
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -50,7 +74,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i][j])
 
     def nearby_mines(self, cell):
         """
@@ -59,6 +83,10 @@ class Minesweeper():
         not including the cell itself.
         """
 
+        # Look up precomputed counts on an array-backed board
+        if self.counts is not None:
+            return int(self.counts[cell])
+
         # Keep count of nearby mines
         count = 0
 
@@ -77,6 +105,26 @@ class Minesweeper():
 
         return count
 
+    def cascade(self, cell):
+        """
+        Returns the cells revealed by clicking a safe cell: the cell
+        itself and, if it has no nearby mines, every cell reachable
+        through neighbors that also have no nearby mines.
+        """
+        revealed = {cell}
+        stack = [cell]
+        while stack:
+            current = stack.pop()
+            if self.nearby_mines(current) != 0:
+                continue
+            for i in range(current[0] - 1, current[0] + 2):
+                for j in range(current[1] - 1, current[1] + 2):
+                    if (0 <= i < self.height and 0 <= j < self.width
+                            and (i, j) not in revealed):
+                        revealed.add((i, j))
+                        stack.append((i, j))
+        return revealed
+
     def won(self):
         """
         Checks if all mines have been flagged.
@@ -84,6 +132,81 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+def neighbor_counts(board):
+    """
+    Returns an array with the number of mines adjacent to each cell of
+    a boolean NumPy board, by convolving it with a 3x3 kernel of ones
+    whose center is zero.
+    """
+    height, width = board.shape
+    padded = np.pad(board.astype(np.uint8), 1)
+    counts = np.zeros((height, width), dtype=np.uint8)
+    for di in range(3):
+        for dj in range(3):
+            if (di, dj) != (1, 1):
+                counts += padded[di:di + height, dj:dj + width]
+    return counts
+
+
+class CellPool():
+    """
+    Set of board cells with O(1) removal and uniform random choice.
+
+    Cells are numbered i * width + j and kept in a virtual array that
+    starts in order. Removing a cell swaps the last cell into its place,
+    and only positions that differ from the starting order are stored,
+    so a pool for a huge board is created in constant time.
+    """
+
+    def __init__(self, height, width):
+        self.width = width
+        self.size = height * width
+
+        # Cell index at each position, and position of each cell index,
+        # where they differ from the starting order
+        self.at = dict()
+        self.where = dict()
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, cell):
+        index = cell[0] * self.width + cell[1]
+        position = self.where.get(index, index)
+        return (position < self.size
+                and self.at.get(position, position) == index)
+
+    def __iter__(self):
+        for position in range(self.size):
+            yield divmod(self.at.get(position, position), self.width)
+
+    def remove(self, cell):
+        """
+        Removes a cell from the pool, if it is there.
+        """
+        if cell not in self:
+            return
+        index = cell[0] * self.width + cell[1]
+        position = self.where.pop(index, index)
+        last = self.size - 1
+        moved = self.at.pop(last, last)
+        if position != last:
+            if moved == position:
+                self.at.pop(position, None)
+                self.where.pop(moved, None)
+            else:
+                self.at[position] = moved
+                self.where[moved] = position
+        self.size = last
+
+    def choice(self):
+        """
+        Returns a uniformly random cell from the pool.
+        """
+        position = random.randrange(self.size)
+        return divmod(self.at.get(position, position), self.width)
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
@@ -92,7 +215,7 @@ class Sentence():
     """
 
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells = frozenset(cells)
         self.count = count
 
     def __eq__(self, other):
@@ -109,7 +232,7 @@ class Sentence():
         Returns the set of all cells in self.cells known to be mines.
         """
         if len(self.cells) == self.count:
-            return self.cells
+            return set(self.cells)
         return set()
 
     def known_safes(self):
@@ -117,7 +240,7 @@ class Sentence():
         Returns the set of all cells in self.cells known to be safe.
         """
         if self.count == 0:
-            return self.cells
+            return set(self.cells)
         return set()
 
     def mark_mine(self, cell):
@@ -126,7 +249,7 @@ class Sentence():
         a cell is known to be a mine.
         """
         if self.is_existed(cell):
-            self.cells.remove(cell)
+            self.cells = self.cells - {cell}
             self.count -= 1
         return None
 
@@ -136,21 +259,264 @@ class Sentence():
         a cell is known to be safe.
         """
         if self.is_existed(cell):
-            self.cells.remove(cell)
+            self.cells = self.cells - {cell}
         return None
 
 
+class BitSentence():
+    """
+    Minesweeper sentence with its cells encoded as bits of an integer.
+
+    Cell (i, j) has index i * width + j, and a set cell is bit
+    (index - offset) of `mask`. The mask is shifted so that its lowest
+    bit is always set, which keeps the integers small on large boards
+    and gives every sentence a single representation.
+    """
+
+    def __init__(self, mask, count, offset=0):
+        if mask:
+            shift = (mask & -mask).bit_length() - 1
+            mask >>= shift
+            offset += shift
+        else:
+            offset = 0
+        self.mask = mask
+        self.count = count
+        self.offset = offset
+
+    def __eq__(self, other):
+        return (self.mask == other.mask and self.count == other.count
+                and self.offset == other.offset)
+
+    def __hash__(self):
+        return hash((self.mask, self.offset, self.count))
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __str__(self):
+        return f"{set(self.indices())} = {self.count}"
+
+    def indices(self):
+        """
+        Yields the index of every cell in the sentence.
+        """
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            yield self.offset + low.bit_length() - 1
+            mask ^= low
+
+    def aligned(self, offset):
+        """
+        Returns the mask shifted so that bit 0 stands for `offset`.
+        """
+        return self.mask << (self.offset - offset)
+
+    def issubset(self, other):
+        offset = min(self.offset, other.offset)
+        mask = self.aligned(offset)
+        return mask & other.aligned(offset) == mask
+
+    def difference(self, other):
+        """
+        Returns the sentence about the cells of `self` not in `other`,
+        assuming `other` is a subset of `self`.
+        """
+        offset = min(self.offset, other.offset)
+        return BitSentence(
+            self.aligned(offset) & ~other.aligned(offset),
+            self.count - other.count,
+            offset
+        )
+
+    def without(self, index, mine):
+        """
+        Returns the sentence with the cell at `index` removed,
+        given whether that cell is a mine.
+        """
+        bit = 1 << (index - self.offset) if index >= self.offset else 0
+        if not self.mask & bit:
+            return self
+        return BitSentence(
+            self.mask & ~bit, self.count - bool(mine), self.offset
+        )
+
+    def known_mines(self):
+        """
+        Returns True if every cell in the sentence is a mine.
+        """
+        return len(self) == self.count
+
+    def known_safes(self):
+        """
+        Returns True if every cell in the sentence is safe.
+        """
+        return self.count == 0
+
+
+def solve_component(constraints, limit=ENUMERATION_LIMIT, samples=SAMPLES,
+                    seed=None):
+    """
+    Counts the mine assignments to a group of cells that satisfy
+    every constraint in a connected component of the frontier.
+
+    `constraints` is a list of (cells, count) pairs, where cells is a
+    tuple of cell indices. Returns (cells, totals, hits): `totals[k]` is
+    the number of assignments with k mines, and `hits[k][n]` how many of
+    those place a mine on cells[n].
+
+    Components with more than `limit` cells are estimated instead, from
+    `samples` random paths that assign the cells in order, each choosing
+    uniformly among the values that keep every constraint satisfiable.
+    A path that completes counts as many times as the inverse of its
+    probability, so the counts are unbiased estimates multiplied by
+    `samples`; the mine probabilities made from them are approximate.
+    """
+    # Visit cells breadth-first so constraints are completed early
+    containing = dict()
+    for c, (members, _) in enumerate(constraints):
+        for cell in members:
+            containing.setdefault(cell, []).append(c)
+    cells = []
+    seen = set()
+    for start in sorted(containing):
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = [start]
+        for cell in queue:
+            cells.append(cell)
+            for c in containing[cell]:
+                for other in constraints[c][0]:
+                    if other not in seen:
+                        seen.add(other)
+                        queue.append(other)
+    watching = [containing[cell] for cell in cells]
+
+    # Mines still to place and cells still unassigned, per constraint
+    remaining = [count for _, count in constraints]
+    unassigned = [len(members) for members, _ in constraints]
+    assigned = [None] * len(cells)
+    totals = dict()
+    hits = dict()
+
+    def apply(n, value, sign):
+        ok = True
+        for c in watching[n]:
+            unassigned[c] -= sign
+            remaining[c] -= sign * value
+            if not 0 <= remaining[c] <= unassigned[c]:
+                ok = False
+        return ok
+
+    def record(weight):
+        k = sum(assigned)
+        totals[k] = totals.get(k, 0) + weight
+        counts = hits.setdefault(k, [0] * len(cells))
+        for i, mine in enumerate(assigned):
+            counts[i] += mine * weight
+
+    def undo():
+        for i in range(len(cells)):
+            if assigned[i] is not None:
+                apply(i, assigned[i], -1)
+                assigned[i] = None
+
+    def search():
+        levels = [None] * len(cells)
+        levels[0] = iter((0, 1))
+        n = 0
+        while n >= 0:
+            if assigned[n] is not None:
+                apply(n, assigned[n], -1)
+                assigned[n] = None
+            value = next(levels[n], None)
+            if value is None:
+                n -= 1
+                continue
+            if not apply(n, value, 1):
+                apply(n, value, -1)
+                continue
+            assigned[n] = value
+            if n + 1 < len(cells):
+                n += 1
+                levels[n] = iter((0, 1))
+                continue
+            record(1)
+        undo()
+
+    def sample(rng):
+        # The weight is the inverse of the probability of the path
+        weight = 1
+        for n in range(len(cells)):
+            feasible = []
+            for value in (0, 1):
+                if apply(n, value, 1):
+                    feasible.append(value)
+                apply(n, value, -1)
+
+            # A dead end counts as a sample with no weight
+            if not feasible:
+                undo()
+                return
+            assigned[n] = rng.choice(feasible)
+            apply(n, assigned[n], 1)
+            weight *= len(feasible)
+        record(weight)
+        undo()
+
+    if len(cells) <= limit:
+        search()
+    else:
+        rng = random.Random(seed)
+        for _ in range(samples):
+            sample(rng)
+    return cells, totals, hits
+
+
+def convolve(a, b):
+    """
+    Returns the distribution of the sum of two independent counts,
+    each given as a dict from number of mines to weight.
+    """
+    result = dict()
+    for i, x in a.items():
+        for j, y in b.items():
+            result[i + j] = result.get(i + j, 0) + x * y
+    return result
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None, guess="random",
+                 processes=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known
+        self.total_mines = mines
+
+        # How to choose a move when no safe move is known:
+        # "random" picks uniformly, "probability" picks the lowest risk
+        if guess not in ("random", "probability"):
+            raise ValueError(f"unknown guessing mode {guess!r}")
+        if guess == "probability" and mines is None:
+            raise ValueError("probability guessing needs the mine count")
+        self.guess = guess
+
+        # Worker processes for solving frontier components
+        self.processes = processes or os.cpu_count() or 1
+
+        # Solutions of the current frontier components, keyed by their
+        # constraints; components a move did not touch are reused
+        self.component_cache = dict()
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -158,8 +524,87 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Cells neither chosen nor known to be mines, and safe cells
+        # not yet chosen, kept up to date as moves and marks are made
+        self.available = CellPool(height, width)
+        self.safe_moves = set()
+
+        # Safe cells in the order they were found; chosen cells are
+        # dropped lazily when they reach the end
+        self.safe_queue = []
+
+        # Set of sentences about the game known to be true,
+        # stored as bitmasks and deduplicated by content
+        self.knowledge = set()
+
+        # Map from each cell index to the sentences that contain it
+        self.index = dict()
+
+        # Sentences whose cells are all mines or all safe,
+        # waiting to be resolved by clean_knowledge
+        self.decided = []
+
+        # Sentences added or changed since they were last compared
+        # with the sentences sharing their cells
+        self.pending = []
+
+    def cell_index(self, cell):
+        """
+        Returns the integer index of a cell.
+        """
+        i, j = cell
+        return i * self.width + j
+
+    def index_cell(self, index):
+        """
+        Returns the (i, j) cell for an integer index.
+        """
+        return divmod(index, self.width)
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and indexes its cells.
+        Cells already known to be mines or safe are removed first.
+        Returns False if the sentence adds nothing new.
+        """
+        for index in list(sentence.indices()):
+            cell = self.index_cell(index)
+            if cell in self.mines:
+                sentence = sentence.without(index, mine=True)
+            elif cell in self.safes:
+                sentence = sentence.without(index, mine=False)
+        if not sentence.mask or sentence in self.knowledge:
+            return False
+        if sentence.known_mines() or sentence.known_safes():
+            self.decided.append(sentence)
+            return True
+        self.knowledge.add(sentence)
+        for index in sentence.indices():
+            self.index.setdefault(index, set()).add(sentence)
+        self.pending.append(sentence)
+        return True
+
+    def discard_sentence(self, sentence):
+        """
+        Removes a sentence from the knowledge base and from the index
+        of every cell it contains.
+        """
+        self.knowledge.discard(sentence)
+        for index in sentence.indices():
+            containing = self.index.get(index)
+            if containing is not None:
+                containing.discard(sentence)
+                if not containing:
+                    del self.index[index]
+
+    def related_sentences(self, sentence):
+        """
+        Returns the sentences sharing at least one cell with `sentence`.
+        """
+        related = set()
+        for index in sentence.indices():
+            related.update(self.index.get(index, ()))
+        return related
 
     def mark_mine(self, cell):
         """
@@ -167,8 +612,11 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.available.remove(cell)
+        for sentence in self.index.pop(self.cell_index(cell), set()):
+            # add_sentence removes the newly known cell
+            self.discard_sentence(sentence)
+            self.add_sentence(sentence)
 
     def mark_safe(self, cell):
         """
@@ -176,8 +624,13 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell not in self.moves_made and cell not in self.safe_moves:
+            self.safe_moves.add(cell)
+            self.safe_queue.append(cell)
+        for sentence in self.index.pop(self.cell_index(cell), set()):
+            # add_sentence removes the newly known cell
+            self.discard_sentence(sentence)
+            self.add_sentence(sentence)
 
     def get_neighbors(self, cell, count):
         """
@@ -218,67 +671,58 @@ class MinesweeperAI():
         """
         # 1
         self.moves_made.add(cell)
+        self.available.remove(cell)
+        self.safe_moves.discard(cell)
         # 2
         self.mark_safe(cell)
         # 3
         neighbors, updated_count = self.get_neighbors(cell, count)
-        new_knowledge = Sentence(neighbors, updated_count)
-        self.knowledge.append(new_knowledge)
+        indices = [self.cell_index(neighbor) for neighbor in neighbors]
+        offset = min(indices, default=0)
+        mask = 0
+        for index in indices:
+            mask |= 1 << (index - offset)
+        self.add_sentence(BitSentence(mask, updated_count, offset))
         # 4, 5
-        new_inference = []
-        for knowledge in self.knowledge:
-            # mark safe and mine of new knowledge
-            if knowledge is new_knowledge:
+        self.infer()
+
+    def infer(self):
+        """
+        Draws conclusions until no sentence changes any more.
+
+        Whenever a sentence is added or changed, it is compared only with
+        the sentences sharing one of its cells. If one is a subset of the
+        other, their difference is a new sentence; new sentences and
+        sentences updated by marking mines or safes are queued in turn.
+        """
+        while self.pending or self.decided:
+            self.clean_knowledge()
+            if not self.pending:
+                break
+            sentence = self.pending.pop()
+
+            # Skip sentences that were resolved or merged since queued
+            if sentence not in self.knowledge:
                 continue
-            # superset case 1
-            elif knowledge.cells.issuperset(new_knowledge.cells):
-                diff = knowledge.cells - new_knowledge.cells
-                if knowledge.count == new_knowledge.count:
-                    for safeFound in diff:
-                        self.mark_safe(safeFound)
-                elif len(diff) == knowledge.count - new_knowledge.count:
-                    for mineFound in diff:
-                        self.mark_mine(mineFound)
-                else:
-                    new_inference.append(Sentence(diff, knowledge.count - new_knowledge.count))
-            # superset case 2
-            elif new_knowledge.cells.issuperset(knowledge.cells):
-                diff = new_knowledge.cells - knowledge.cells
-                if new_knowledge.count == knowledge.count:
-                    for safeFound in diff:
-                        self.mark_safe(safeFound)
-                elif len(diff) == new_knowledge.count - knowledge.count:
-                    for mineFound in diff:
-                        self.mark_mine(mineFound)
-                else:
-                    new_inference.append(Sentence(diff, new_knowledge.count - knowledge.count))
-        # add new inference to knowledge
-        self.knowledge.extend(new_inference)
-        # clean knowledge
-        self.clean_knowledge()
+            for other in self.related_sentences(sentence):
+                if other is sentence:
+                    continue
+                if sentence.issubset(other):
+                    self.add_sentence(other.difference(sentence))
+                elif other.issubset(sentence):
+                    self.add_sentence(sentence.difference(other))
 
     def clean_knowledge(self):
-        # clear duplicate knowledge
-        cleaned = []
-        for knowledge in self.knowledge:
-            if knowledge not in cleaned:
-                cleaned.append(knowledge)
-        self.knowledge = cleaned
-
-        cleaned = []
-        for knowledge in self.knowledge:
-            cleaned.append(knowledge)
-            kmines = {km for km in knowledge.known_mines()}
-            ksafes = {ks for ks in knowledge.known_safes()}
-            if kmines:
-                for mineFound in kmines:
-                    self.mark_mine(mineFound)
-                cleaned.pop(-1)
-            elif ksafes:
-                for safeFound in ksafes:
-                    self.mark_safe(safeFound)
-                cleaned.pop(-1)
-        self.knowledge = cleaned
+        # mark the cells of sentences known to be all mines or all safe,
+        # which may in turn decide further sentences
+        while self.decided:
+            knowledge = self.decided.pop()
+            mines = knowledge.known_mines()
+            for index in knowledge.indices():
+                if mines:
+                    self.mark_mine(self.index_cell(index))
+                else:
+                    self.mark_safe(self.index_cell(index))
 
     def make_safe_move(self):
         """
@@ -289,18 +733,13 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        safes = self.safes - self.moves_made
-        if safes:
-            return safes.pop()
+        while self.safe_queue:
+            cell = self.safe_queue[-1]
+            if cell in self.safe_moves:
+                return cell
+            self.safe_queue.pop()
         return None
 
-    def all_cells(self):
-        cells = set()
-        for i in range(self.height):
-            for j in range(self.width):
-                cells.add((i,j))
-        return cells
-
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
@@ -308,8 +747,149 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        board = self.all_cells()
-        available = board - self.mines - self.moves_made
-        if available:
-            return random.choice(list(available))
-        return None
+        if not self.available:
+            return None
+        if self.guess == "random":
+            return self.available.choice()
+
+        # Safe cells are only left if make_safe_move was not asked first
+        if self.safe_moves:
+            return self.make_safe_move()
+        probabilities, interior = self.mine_probabilities()
+        lowest = min(probabilities.values(), default=1)
+        if interior is not None and interior <= lowest:
+            return self.random_interior_cell(probabilities)
+        return random.choice([
+            cell for cell, p in probabilities.items() if p == lowest
+        ])
+
+    def random_interior_cell(self, frontier):
+        """
+        Returns a random available cell that is not on the frontier.
+        """
+        # Frontier cells are usually few, so rejection is quick
+        for _ in range(64):
+            cell = self.available.choice()
+            if cell not in frontier:
+                return cell
+        return random.choice([
+            cell for cell in self.available if cell not in frontier
+        ])
+
+    def frontier_components(self):
+        """
+        Splits the knowledge base into groups of sentences that share
+        no cells with any other group. Returns a list of constraint
+        lists, each constraint a (cells, count) pair of cell indices.
+        """
+        parent = dict()
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        for sentence in self.knowledge:
+            indices = list(sentence.indices())
+            for index in indices:
+                parent.setdefault(index, index)
+            for index in indices[1:]:
+                parent[find(index)] = find(indices[0])
+
+        components = dict()
+        for sentence in self.knowledge:
+            root = find(next(sentence.indices()))
+            components.setdefault(root, []).append(
+                (tuple(sentence.indices()), sentence.count)
+            )
+        return [sorted(constraints) for constraints in components.values()]
+
+    def solve_components(self, components):
+        """
+        Returns the solve_component result for every component,
+        reusing cached solutions and solving large ones in parallel.
+        Sampled components are seeded from the random module, so a
+        seeded game is reproducible.
+        """
+        keys = [tuple(constraints) for constraints in components]
+        cache = {key: self.component_cache[key] for key in keys
+                 if key in self.component_cache}
+        missing = [key for key in dict.fromkeys(keys) if key not in cache]
+        sizes = {key: len({c for cells, _ in key for c in cells})
+                 for key in missing}
+        seeds = {key: random.getrandbits(64) for key in missing
+                 if sizes[key] > ENUMERATION_LIMIT}
+        large = [key for key in missing if sizes[key] >= PARALLEL_CELLS]
+        if len(large) > 1 and self.processes > 1:
+            with ProcessPoolExecutor(self.processes) as executor:
+                solutions = executor.map(
+                    solve_component, large,
+                    itertools.repeat(ENUMERATION_LIMIT),
+                    itertools.repeat(SAMPLES),
+                    [seeds.get(key) for key in large]
+                )
+                cache.update(zip(large, solutions))
+        for key in missing:
+            if key not in cache:
+                cache[key] = solve_component(key, seed=seeds.get(key))
+
+        # Only the current components can be asked for again soon
+        self.component_cache = cache
+        return [cache[key] for key in keys]
+
+    def mine_probabilities(self):
+        """
+        Returns the probability that each frontier cell (a cell in some
+        sentence) is a mine, as a dict, together with the probability
+        for every other available cell, or None if there are no others.
+
+        Every consistent assignment of mines to the frontier is weighted
+        by the number of ways to place the remaining mines among the
+        other available cells.
+        """
+        solutions = self.solve_components(self.frontier_components())
+        frontier = sum(len(cells) for cells, _, _ in solutions)
+        interior = len(self.available) - frontier - len(self.safe_moves)
+        remaining = self.total_mines - len(self.mines)
+
+        def weight(k):
+            if 0 <= remaining - k <= interior:
+                return math.comb(interior, remaining - k)
+            return 0
+
+        # Distribution of frontier mines without each component
+        prefix = [{0: 1}]
+        for _, totals, _ in solutions:
+            prefix.append(convolve(prefix[-1], totals))
+        suffix = [{0: 1}]
+        for _, totals, _ in reversed(solutions):
+            suffix.append(convolve(suffix[-1], totals))
+        suffix.reverse()
+
+        # Fall back to ignoring the mine count if it cannot be met
+        total = sum(w * weight(k) for k, w in prefix[-1].items())
+        if total == 0:
+            def weight(k):
+                return 1
+            total = sum(prefix[-1].values()) or 1
+
+        probabilities = {cell: 0 for cell in self.safe_moves}
+        for c, (cells, totals, hits) in enumerate(solutions):
+            others = convolve(prefix[c], suffix[c + 1])
+            scale = {
+                k: sum(w * weight(k + j) for j, w in others.items())
+                for k in totals
+            }
+            for n, index in enumerate(cells):
+                mines = sum(hits[k][n] * scale[k] for k in totals)
+                probabilities[self.index_cell(index)] = mines / total
+
+        # Every cell off the frontier is equally likely to be a mine
+        if interior <= 0:
+            return probabilities, None
+        expected = sum(
+            w * weight(k) * max(remaining - k, 0)
+            for k, w in prefix[-1].items()
+        )
+        return probabilities, expected / total / interior
@@ -8,6 +8,9 @@ HEIGHT = 8
 WIDTH = 8
 MINES = 8
 
+# Frames per second; the loop sleeps between frames
+FPS = 30
+
 # Colors
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
@@ -17,6 +20,7 @@ WHITE = (255, 255, 255)
 pygame.init()
 size = width, height = 600, 400
 screen = pygame.display.set_mode(size)
+clock = pygame.time.Clock()
 
 # Fonts
 OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
@@ -31,15 +35,66 @@ board_height = height - (BOARD_PADDING * 2)
 cell_size = int(min(board_width / WIDTH, board_height / HEIGHT))
 board_origin = (BOARD_PADDING, BOARD_PADDING)
 
-# Add images
+# Add images, scaled once
 flag = pygame.image.load("assets/images/flag.png")
 flag = pygame.transform.scale(flag, (cell_size, cell_size))
 mine = pygame.image.load("assets/images/mine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
+# Render every possible neighbor count once
+numbers = [smallFont.render(str(n), True, BLACK) for n in range(9)]
+
+# Cell rectangles never move, so compute them once
+cells = [
+    [
+        pygame.Rect(
+            board_origin[0] + j * cell_size,
+            board_origin[1] + i * cell_size,
+            cell_size, cell_size
+        )
+        for j in range(WIDTH)
+    ]
+    for i in range(HEIGHT)
+]
+
+# AI Move and Reset buttons
+aiButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+aiButtonText = mediumFont.render("AI Move", True, BLACK)
+resetButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+resetButtonText = mediumFont.render("Reset", True, BLACK)
+
+# Area of the won/lost message
+statusRect = pygame.Rect(
+    (2 / 3) * width, (2 / 3) * height - 30, width / 3, 60
+)
+statusTexts = {
+    text: mediumFont.render(text, True, WHITE)
+    for text in ["", "Lost", "Won"]
+}
+
+# Instructions screen
+title = largeFont.render("Play Minesweeper", True, WHITE)
+rules = [
+    smallFont.render(rule, True, WHITE) for rule in [
+        "Click a cell to reveal it.",
+        "Right-click a cell to mark it as a mine.",
+        "Mark all mines successfully to win!"
+    ]
+]
+playButton = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
+playButtonText = mediumFont.render("Play Game", True, BLACK)
+
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(
+    height=HEIGHT, width=WIDTH, mines=MINES, guess="probability"
+)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
@@ -49,115 +104,114 @@ lost = False
 # Show instructions initially
 instructions = True
 
+# Redraw everything on the next frame, or only the cells listed
+redraw_all = True
+dirty = set()
+status = None
+
+
+def blit_centered(surface, center):
+    """Draws a surface centered on a point and returns its rectangle."""
+    rect = surface.get_rect()
+    rect.center = center
+    screen.blit(surface, rect)
+    return rect
+
+
+def draw_button(rect, text):
+    pygame.draw.rect(screen, WHITE, rect)
+    blit_centered(text, rect.center)
+
+
+def draw_cell(i, j):
+    """Draws one cell of the board and returns its rectangle."""
+    rect = cells[i][j]
+    pygame.draw.rect(screen, GRAY, rect)
+    pygame.draw.rect(screen, WHITE, rect, 3)
+
+    # Add a mine, flag, or number if needed
+    if game.is_mine((i, j)) and lost:
+        screen.blit(mine, rect)
+    elif (i, j) in flags:
+        screen.blit(flag, rect)
+    elif (i, j) in revealed:
+        blit_centered(numbers[game.nearby_mines((i, j))], rect.center)
+    return rect
+
+
+def draw_status(text):
+    """Draws the won/lost message and returns its area."""
+    screen.fill(BLACK, statusRect)
+    blit_centered(statusTexts[text], ((5 / 6) * width, (2 / 3) * height))
+    return statusRect
+
+
 while True:
 
+    # Cap the frame rate so an idle window barely uses the CPU
+    clock.tick(FPS)
+
     # Check if game quit
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             sys.exit()
 
-    screen.fill(BLACK)
+        # Repaint everything once the window is uncovered
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            redraw_all = True
 
     # Show game instructions
     if instructions:
 
-        # Title
-        title = largeFont.render("Play Minesweeper", True, WHITE)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
-
-        # Rules
-        rules = [
-            "Click a cell to reveal it.",
-            "Right-click a cell to mark it as a mine.",
-            "Mark all mines successfully to win!"
-        ]
-        for i, rule in enumerate(rules):
-            line = smallFont.render(rule, True, WHITE)
-            lineRect = line.get_rect()
-            lineRect.center = ((width / 2), 150 + 30 * i)
-            screen.blit(line, lineRect)
-
-        # Play game button
-        buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
-        buttonText = mediumFont.render("Play Game", True, BLACK)
-        buttonTextRect = buttonText.get_rect()
-        buttonTextRect.center = buttonRect.center
-        pygame.draw.rect(screen, WHITE, buttonRect)
-        screen.blit(buttonText, buttonTextRect)
+        if redraw_all:
+            screen.fill(BLACK)
+
+            # Title
+            blit_centered(title, ((width / 2), 50))
+
+            # Rules
+            for i, line in enumerate(rules):
+                blit_centered(line, ((width / 2), 150 + 30 * i))
+
+            # Play game button
+            draw_button(playButton, playButtonText)
+            pygame.display.flip()
+            redraw_all = False
 
         # Check if play button clicked
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1:
             mouse = pygame.mouse.get_pos()
-            if buttonRect.collidepoint(mouse):
+            if playButton.collidepoint(mouse):
                 instructions = False
+                redraw_all = True
                 time.sleep(0.3)
-
-        pygame.display.flip()
         continue
 
-    # Draw board
-    cells = []
-    for i in range(HEIGHT):
-        row = []
-        for j in range(WIDTH):
-
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size, cell_size
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if game.is_mine((i, j)) and lost:
-                screen.blit(mine, rect)
-            elif (i, j) in flags:
-                screen.blit(flag, rect)
-            elif (i, j) in revealed:
-                neighbors = smallFont.render(
-                    str(game.nearby_mines((i, j))),
-                    True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Display text
+    # Draw the whole screen only when its layout changed
     text = "Lost" if lost else "Won" if game.mines == flags else ""
-    text = mediumFont.render(text, True, WHITE)
-    textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
-    screen.blit(text, textRect)
+    if redraw_all:
+        screen.fill(BLACK)
+        for i in range(HEIGHT):
+            for j in range(WIDTH):
+                draw_cell(i, j)
+        draw_button(aiButton, aiButtonText)
+        draw_button(resetButton, resetButtonText)
+        draw_status(text)
+        pygame.display.flip()
+        redraw_all = False
+        dirty = set()
+        status = text
+
+    # Otherwise only update what changed since the last frame
+    else:
+        rects = [draw_cell(i, j) for i, j in dirty]
+        if text != status:
+            rects.append(draw_status(text))
+            status = text
+        if rects:
+            pygame.display.update(rects)
+        dirty = set()
 
     move = None
 
@@ -173,6 +227,7 @@ while True:
                         flags.remove((i, j))
                     else:
                         flags.add((i, j))
+                    dirty.add((i, j))
                     time.sleep(0.2)
 
     elif left == 1:
@@ -184,6 +239,7 @@ while True:
             if move is None:
                 move = ai.make_random_move()
                 if move is None:
+                    dirty.update(flags ^ ai.mines)
                     flags = ai.mines.copy()
                     print("No moves left to make.")
                 else:
@@ -195,10 +251,13 @@ while True:
         # Reset game state
         elif resetButton.collidepoint(mouse):
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            ai = MinesweeperAI(
+                height=HEIGHT, width=WIDTH, mines=MINES, guess="probability"
+            )
             revealed = set()
             flags = set()
             lost = False
+            redraw_all = True
             continue
 
         # User-made move
@@ -214,9 +273,11 @@ while True:
     if move:
         if game.is_mine(move):
             lost = True
+
+            # Every mine is shown once the game is lost
+            redraw_all = True
         else:
             nearby = game.nearby_mines(move)
             revealed.add(move)
+            dirty.add(move)
             ai.add_knowledge(move, nearby)
-
-    pygame.display.flip()
@@ -0,0 +1,125 @@
+import argparse
+import json
+import multiprocessing
+import random
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Minesweeper games with the AI, without a display."
+    )
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--density", type=float, default=0.125,
+                        help="fraction of cells that are mines")
+    parser.add_argument("--guess", choices=["random", "probability"],
+                        default="random")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    mines = round(args.height * args.width * args.density)
+    results = simulate(
+        args.games, args.height, args.width, mines,
+        guess=args.guess, seed=args.seed, processes=args.processes
+    )
+    text = json.dumps(results, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+def simulate(games, height, width, mines, guess="random", seed=0,
+             processes=None):
+    """
+    Plays `games` games across a process pool and returns a summary.
+    Game k is seeded with `seed + k`, so results are reproducible
+    whatever the number of processes.
+    """
+    tasks = [
+        (height, width, mines, guess, seed + k) for k in range(games)
+    ]
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        played = pool.map(play, tasks)
+    elapsed = time.perf_counter() - start
+
+    moves = sum(game["moves"] for game in played)
+    seconds = sum(game["seconds"] for game in played)
+    return {
+        "games": games,
+        "height": height,
+        "width": width,
+        "mines": mines,
+        "guess": guess,
+        "seed": seed,
+        "wall_seconds": elapsed,
+        "win_rate": sum(game["won"] for game in played) / games,
+        "guesses_per_game": sum(game["guesses"] for game in played) / games,
+        "decisions_per_second": moves / seconds if seconds else None,
+        "add_knowledge_seconds": sum(
+            game["add_knowledge_seconds"] for game in played
+        ),
+        "add_knowledge_fraction": sum(
+            game["add_knowledge_seconds"] for game in played
+        ) / seconds if seconds else None,
+    }
+
+
+def play(task):
+    """
+    Plays one game and returns its statistics. The AI's moves are
+    counted as decisions; guesses are moves not known to be safe.
+    """
+    height, width, mines, guess, seed = task
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+
+    # Pool workers cannot start processes of their own
+    ai = MinesweeperAI(
+        height=height, width=width, mines=mines, guess=guess, processes=1
+    )
+
+    moves = 0
+    guesses = 0
+    won = False
+    add_knowledge_seconds = 0
+    start = time.perf_counter()
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                won = True
+                break
+            guesses += 1
+        moves += 1
+        if game.is_mine(move):
+            break
+        nearby = game.nearby_mines(move)
+        before = time.perf_counter()
+        ai.add_knowledge(move, nearby)
+        add_knowledge_seconds += time.perf_counter() - before
+
+        # Every safe cell has been revealed
+        if len(ai.moves_made) == height * width - mines:
+            won = True
+            break
+
+    return {
+        "won": won,
+        "moves": moves,
+        "guesses": guesses,
+        "seconds": time.perf_counter() - start,
+        "add_knowledge_seconds": add_knowledge_seconds,
+    }
+
+
+if __name__ == "__main__":
+    main()
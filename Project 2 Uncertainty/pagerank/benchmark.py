@@ -0,0 +1,279 @@
+import argparse
+import contextlib
+import io
+import numpy as np
+import os
+import tempfile
+import time
+import tracemalloc
+
+from pagerank import (
+    DAMPING, METHODS, SAMPLES, crawl, iterate_pagerank, link_matrix,
+    out_of_core_pagerank, parallel_sample_pagerank, personalized_pagerank,
+    power_iteration, sample_pagerank, sparse_pagerank, update_pagerank,
+    vectorized_sample_pagerank, write_edge_file
+)
+
+# Seconds a backend may take on one graph before it is skipped on the
+# larger graphs; slower runs are not repeated to trace their memory
+TIME_BUDGET = 30
+
+# Tolerance of the iterative backends, as an L1 change between steps
+TOLERANCE = 1e-6
+
+# Out-degrees and page popularity follow power laws with these
+# exponents, and this fraction of pages has no links at all
+OUT_EXPONENT = 2.1
+POPULARITY_EXPONENT = 0.8
+DANGLING = 0.05
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+    <head>
+        <title>{name}</title>
+    </head>
+    <body>
+        <h1>{name}</h1>
+
+        <div>Links:</div>
+        <ul>
+{links}
+        </ul>
+    </body>
+</html>
+"""
+LINK = '            <li><a href="{name}.html">{name}</a></li>'
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time PageRank backends on synthetic web graphs."
+    )
+    parser.add_argument("scales", type=int, nargs="+",
+                        help="numbers of pages to generate")
+    parser.add_argument("--format", choices=["html", "edges"],
+                        default="html",
+                        help="write graphs as HTML pages to crawl, "
+                             "or only as edge files")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'n':>8}  {'backend':<30}{'seconds':>10}"
+          f"{'peak KiB':>12}{'L1 error':>12}")
+    active = set(crawls()) | set(backends())
+    for n in args.scales:
+        sources, targets = generate_graph(n, rng)
+        corpus = edge_corpus(n, sources, targets)
+        with tempfile.TemporaryDirectory() as directory:
+            if args.format == "html":
+                crawl_rows(directory, n, sources, targets, corpus, active)
+            path = os.path.join(directory, "edges.npy")
+            write_edge_file(path, sources, targets)
+            reference = reference_pagerank(corpus)
+            previous = previous_pagerank(corpus)
+            for name, backend in backends(path, n, previous).items():
+                if name not in active:
+                    continue
+                seconds, peak, ranks = measure(backend, corpus)
+                error = sum(abs(ranks[page] - reference[page])
+                            for page in corpus)
+                report(n, name, seconds, peak, error)
+                if seconds > TIME_BUDGET:
+                    active.remove(name)
+
+
+def generate_graph(n, rng):
+    """
+    Return (sources, targets) for a random web graph of n pages whose
+    out-degrees and in-degrees follow power laws.
+    """
+    out_degree = np.minimum(rng.zipf(OUT_EXPONENT, n), n - 1)
+    out_degree[rng.random(n) < DANGLING] = 0
+
+    # Popular pages are linked to more often, whatever their number
+    popularity = rng.permutation(n) + 1.0
+    popularity **= -POPULARITY_EXPONENT
+    sources = np.repeat(np.arange(n), out_degree)
+    popularity /= popularity.sum()
+    targets = rng.choice(n, size=len(sources), p=popularity)
+
+    # Drop links of a page to itself and repeated links
+    keep = sources != targets
+    links = np.unique(sources[keep] * n + targets[keep])
+    return links // n, links % n
+
+
+def edge_corpus(n, sources, targets):
+    """
+    Return the corpus dictionary of a graph, naming page i "i.html".
+    """
+    corpus = {f"{i}.html": set() for i in range(n)}
+    for source, target in zip(sources.tolist(), targets.tolist()):
+        corpus[f"{source}.html"].add(f"{target}.html")
+    return corpus
+
+
+def write_corpus(directory, n, sources, targets):
+    """
+    Write a graph as a directory of HTML pages like those in corpus0.
+    """
+    starts = np.searchsorted(sources, np.arange(n + 1))
+    targets = targets.tolist()
+    for i in range(n):
+        links = "\n".join(
+            LINK.format(name=j) for j in targets[starts[i]:starts[i + 1]]
+        )
+        with open(os.path.join(directory, f"{i}.html"), "w") as f:
+            f.write(PAGE.format(name=i, links=links))
+
+
+def crawls(pages=None, store=None):
+    """
+    Return a dictionary from crawl names to functions that crawl the
+    HTML pages in `pages`, with no store, into a new store at `store`,
+    or from that store once it exists.
+    """
+    return {
+        "crawl": lambda: crawl(pages),
+        "crawl (new store)": lambda: crawl(pages, store=store),
+        "crawl (unchanged store)": lambda: crawl(pages, store=store),
+    }
+
+
+def crawl_rows(directory, n, sources, targets, corpus, active):
+    """
+    Write a graph as HTML pages and report the time taken by each crawl
+    in `active`, removing those over the time budget.
+    """
+    pages = os.path.join(directory, "pages")
+    store = os.path.join(directory, "store")
+    os.mkdir(pages)
+    write_corpus(pages, n, sources, targets)
+    for name, run in crawls(pages, store).items():
+        if name not in active:
+            continue
+        start = time.perf_counter()
+        crawled = run()
+        seconds = time.perf_counter() - start
+        if crawled != corpus:
+            raise RuntimeError(f"{name} does not match the generated graph")
+        report(n, name, seconds, None, None)
+        if seconds > TIME_BUDGET:
+            active.remove(name)
+
+            # Only a crawl into a new store leaves one to crawl unchanged
+            if name == "crawl (new store)":
+                active.discard("crawl (unchanged store)")
+
+
+def reference_pagerank(corpus):
+    """
+    Return PageRank values computed to the limits of double precision.
+    """
+    pages, matrix, dangling = link_matrix(corpus)
+    ranks = power_iteration(
+        matrix, dangling, DAMPING, tolerance=1e-14, max_iterations=10000
+    )
+    return dict(zip(pages, ranks.tolist()))
+
+
+def previous_pagerank(corpus):
+    """
+    Return PageRank values from before the page with the most links
+    had any, for `update_pagerank` to start from.
+    """
+    page = max(corpus, key=lambda page: len(corpus[page]))
+    return sparse_pagerank({**corpus, page: set()}, DAMPING)
+
+
+def backends(path=None, n=None, previous=None):
+    """
+    Return a dictionary from backend names to functions that take a
+    corpus and return its PageRank values. Backends that read the
+    graph from disk use the edge file at `path` for n pages, and
+    incremental updates start from `previous`.
+    """
+    def iterate(method):
+        return lambda corpus: quietly(
+            iterate_pagerank, corpus, DAMPING, method=method,
+            tolerance=TOLERANCE, norm="l1"
+        )
+
+    def parallel(corpus):
+        ranks, _ = parallel_sample_pagerank(corpus, DAMPING, SAMPLES)
+        return ranks
+
+    def personalized(corpus):
+        pages, ranks = personalized_pagerank(
+            corpus, DAMPING, np.ones((len(corpus), 1)), TOLERANCE
+        )
+        return dict(zip(pages, ranks[:, 0].tolist()))
+
+    def update(corpus):
+        ranks, _, _ = update_pagerank(corpus, DAMPING, previous, TOLERANCE)
+        return ranks
+
+    def out_of_core(corpus):
+        ranks = out_of_core_pagerank(
+            path, n, DAMPING, TOLERANCE, norm="l1"
+        )
+        return {f"{i}.html": rank for i, rank in enumerate(ranks.tolist())}
+
+    backends = {
+        "sample_pagerank": lambda corpus: quietly(
+            sample_pagerank, corpus, DAMPING, SAMPLES
+        ),
+        "vectorized_sample_pagerank": lambda corpus: (
+            vectorized_sample_pagerank(corpus, DAMPING, SAMPLES)
+        ),
+        "parallel_sample_pagerank": parallel,
+    }
+    for method in METHODS:
+        backends[f"iterate_pagerank {method}"] = iterate(method)
+    backends.update({
+        "sparse_pagerank": lambda corpus: sparse_pagerank(
+            corpus, DAMPING, TOLERANCE
+        ),
+        "personalized_pagerank": personalized,
+        "update_pagerank": update,
+        "out_of_core_pagerank": out_of_core,
+    })
+    return backends
+
+
+def quietly(function, *args, **kwargs):
+    """Call a function with its printed output discarded."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def measure(backend, corpus):
+    """
+    Return wall time, peak traced memory in bytes and PageRank values
+    for one backend on one corpus. Memory is traced in a second run,
+    skipped for backends over the time budget, and leaves out worker
+    processes.
+    """
+    start = time.perf_counter()
+    ranks = backend(corpus)
+    seconds = time.perf_counter() - start
+    if seconds > TIME_BUDGET:
+        return seconds, None, ranks
+
+    tracemalloc.start()
+    backend(corpus)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, ranks
+
+
+def report(n, name, seconds, peak, error):
+    """Print one row of results, leaving out what was not measured."""
+    peak = "-" if peak is None else f"{peak / 1024:.1f}"
+    error = "-" if error is None else f"{error:.2e}"
+    print(f"{n:>8}  {name:<30}{seconds:>10.4f}{peak:>12}{error:>12}")
+
+
+if __name__ == "__main__":
+    main()
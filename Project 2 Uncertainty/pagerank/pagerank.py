@@ -1,11 +1,62 @@
+import json
+import multiprocessing
+import numpy as np
 import os
+import posixpath
 import random
-import re
 import sys
 
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Pages parsed per task when crawling, and bytes fed to the parser at once
+CRAWL_CHUNK = 256
+READ_SIZE = 1 << 16
+
+# L1 change in the rank vector at which power iteration stops
+TOLERANCE = 1e-8
+MAX_ITERATIONS = 1000
+
+# Random surfers simulated side by side when sampling
+WALKERS = 10000
+
+# Steps taken before visits are added to the counts
+STEPS_PER_CHUNK = 64
+
+# Surfers walk uncounted until their starting page matters less than this
+BURN_IN_ERROR = 1e-6
+
+# Independent sampling runs per worker process, used to estimate
+# standard errors; at least MIN_BATCHES are run before stopping early
+BATCHES_PER_PROCESS = 8
+MIN_BATCHES = 4
+
+# Solvers for iterate_pagerank and the norms it can measure change in
+METHODS = ["jacobi", "gauss-seidel", "quadratic", "aitken", "adaptive"]
+NORMS = {"max": np.inf, "l1": 1, "l2": 2}
+
+# Power steps between two extrapolations
+EXTRAPOLATION_PERIOD = 10
+
+# Pages stop being updated once they change by less than this
+# fraction of their share of the tolerance for FREEZE_STEPS steps
+FREEZE_RATIO = 0.1
+FREEZE_STEPS = 5
+
+# Fraction of pages above which update_pagerank pushes from all pages
+DENSE_PUSH = 0.1
+
+# Edges read into memory at a time by out_of_core_pagerank
+BLOCK_EDGES = 1 << 20
+
+# Teleport vectors iterated together, few enough to stay in cache
+BATCH_COLUMNS = 64
+
 
 def main():
     if len(sys.argv) != 2:
@@ -21,31 +72,349 @@ def main():
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def crawl(directory, processes=None, store=None):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
+
+    Subdirectories are searched too; their pages are named by their
+    path relative to `directory`. If `store` is given, the link graph
+    is kept there between runs (see `update_store`).
+    """
+    if store is not None:
+        update_store(directory, store, processes)
+        pages, sources, targets = stored_edges(store)
+    else:
+        pages, sources, targets = crawl_edges(directory, processes)
+    corpus = {page: set() for page in pages}
+    for source, target in zip(sources.tolist(), targets.tolist()):
+        corpus[pages[source]].add(pages[target])
+    return corpus
+
+
+def crawl_edges(directory, processes=None):
+    """
+    Return (pages, sources, targets) for a directory of HTML pages,
+    in the form of `corpus_edges`, without building a dictionary.
+
+    Every page gets an integer id from its position in `pages`. Files
+    are parsed in chunks across worker processes, which stream back the
+    links of each chunk as arrays of ids. Links to the page itself or
+    to pages outside the corpus are left out.
+    """
+    pages = list(scan_pages(directory))
+    ids = {page: i for i, page in enumerate(pages)}
+    sources = [np.zeros(0, dtype=np.int64)]
+    targets = [np.zeros(0, dtype=np.int64)]
+    for chunk_sources, chunk_targets in map_chunks(
+        crawl_chunk, directory, pages, ids, processes
+    ):
+        sources.append(chunk_sources)
+        targets.append(chunk_targets)
+    return pages, np.concatenate(sources), np.concatenate(targets)
+
+
+def map_chunks(function, directory, pages, ids=None, processes=None):
+    """
+    Return the list of `function(chunk)` for consecutive chunks of
+    CRAWL_CHUNK pages, where a chunk is a (start, end) range of
+    positions in `pages`. Chunks are handled by worker processes set up
+    by `init_crawler`, unless there is only one or `processes` is 1.
+    """
+    chunks = [
+        (start, min(start + CRAWL_CHUNK, len(pages)))
+        for start in range(0, len(pages), CRAWL_CHUNK)
+    ]
+    if len(chunks) <= 1 or processes == 1:
+        init_crawler(directory, pages, ids)
+        return list(map(function, chunks))
+    with ProcessPoolExecutor(
+        processes, initializer=init_crawler,
+        initargs=(directory, pages, ids)
+    ) as executor:
+        return list(executor.map(function, chunks))
+
+
+def scan_pages(directory):
+    """
+    Yield the path of every HTML file under `directory`, relative to it
+    and using "/" as separator, in sorted order.
+    """
+    for name, _ in scan_files(directory):
+        yield name
+
+
+def scan_files(directory):
+    """
+    Yield (name, entry) for every HTML file under `directory`, where
+    name is as in `scan_pages` and entry is its os.DirEntry.
+    """
+    stack = [""]
+    while stack:
+        prefix = stack.pop()
+        with os.scandir(os.path.join(directory, prefix)) as entries:
+            entries = sorted(entries, key=lambda entry: entry.name)
+        subdirectories = []
+        for entry in entries:
+            name = posixpath.join(prefix, entry.name)
+            if entry.is_dir():
+                subdirectories.append(name)
+            elif entry.name.endswith(".html"):
+                yield name, entry
+        stack.extend(reversed(subdirectories))
+
+
+class LinkParser(HTMLParser):
+    """
+    HTML tokenizer that collects the href of every <a> tag,
+    fed incrementally rather than matched against the whole file.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href" and value is not None:
+                    self.links.append(value)
+
+
+def parse_links(path):
+    """
+    Return the list of link targets in an HTML file.
+    """
+    parser = LinkParser()
+    with open(path, errors="replace") as f:
+        while chunk := f.read(READ_SIZE):
+            parser.feed(chunk)
+    parser.close()
+    return parser.links
+
+
+def resolve_link(page, link):
+    """
+    Return the name of the page a link points to, relative to the
+    corpus directory, given the name of the page containing it.
+    """
+    link = link.split("#")[0].split("?")[0]
+    if not link:
+        return None
+    return posixpath.normpath(posixpath.join(posixpath.dirname(page), link))
+
+
+# Corpus being crawled, shared by the chunks parsed in one process
+crawler_state = None
+
+
+def init_crawler(directory, pages, ids):
+    global crawler_state
+    crawler_state = (directory, pages, ids)
+
+
+def crawl_chunk(chunk):
+    """
+    Return (sources, targets) arrays for the links of the pages with
+    ids from chunk[0] up to chunk[1], in a process set up by
+    `init_crawler`.
+    """
+    directory, pages, ids = crawler_state
+    sources = []
+    targets = []
+    for i in range(*chunk):
+        linked = set()
+        for name in page_links(directory, pages[i]):
+            target = ids.get(name)
+            if target is not None:
+                linked.add(target)
+        sources.extend([i] * len(linked))
+        targets.extend(sorted(linked))
+    return (
+        np.array(sources, dtype=np.int64),
+        np.array(targets, dtype=np.int64)
+    )
+
+
+def page_links(directory, page):
     """
-    pages = dict()
+    Return the set of page names linked to by a page, other than
+    itself, whether or not they are in the corpus.
+    """
+    links = set()
+    for link in parse_links(os.path.join(directory, page)):
+        name = resolve_link(page, link)
+        if name is not None and name != page:
+            links.add(name)
+    return links
+
+
+def link_chunk(chunk):
+    """
+    Return the `page_links` of the pages from chunk[0] up to chunk[1],
+    in a process set up by `init_crawler`.
+    """
+    directory, pages, _ = crawler_state
+    return [page_links(directory, pages[i]) for i in range(*chunk)]
+
+
+# Files making up a link-graph store
+STORE_FILES = ["indptr", "indices", "present", "mtimes", "sizes"]
+
 
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
+def load_store(store):
+    """
+    Return the link graph kept in `store` as a dict with the list of
+    "names" and memory-mapped arrays, or None if there is no store.
+
+    Every page ever seen or linked to has an id; "present" marks the
+    ids whose page is currently in the corpus, and the links of page i
+    are indices[indptr[i]:indptr[i + 1]], including links to pages
+    that are not present. "mtimes" and "sizes" describe each file as
+    it was when last parsed.
+    """
+    try:
+        with open(os.path.join(store, "names.json")) as f:
+            graph = {"names": json.load(f)}
+        for name in STORE_FILES:
+            graph[name] = np.load(
+                os.path.join(store, f"{name}.npy"), mmap_mode="r"
+            )
+    except FileNotFoundError:
+        return None
+    return graph
+
+
+def save_store(store, graph):
+    """
+    Write a link graph in the format of `load_store`.
+    """
+    os.makedirs(store, exist_ok=True)
+    for name in STORE_FILES:
+        path = os.path.join(store, f"{name}.npy")
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, graph[name])
+        os.replace(path + ".tmp", path)
+    path = os.path.join(store, "names.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(graph["names"], f)
+    os.replace(path + ".tmp", path)
+
+
+def update_store(directory, store, processes=None):
+    """
+    Bring the link graph in `store` up to date with `directory`,
+    creating it if needed, and return whether anything changed.
+
+    Only files whose modification time or size differ from the stored
+    ones, and files that are new, are parsed again. Deleted pages keep
+    their id but are no longer present. Links are stored by id even
+    when they point outside the corpus, so a page added later picks up
+    the links to it from unchanged pages.
+    """
+    graph = load_store(store)
+    if graph is None:
+        graph = {
+            "names": [],
+            "indptr": np.zeros(1, dtype=np.int64),
+            "indices": np.zeros(0, dtype=np.int64),
+            "present": np.zeros(0, dtype=bool),
+            "mtimes": np.zeros(0, dtype=np.int64),
+            "sizes": np.zeros(0, dtype=np.int64),
+        }
+    names = list(graph["names"])
+    ids = {name: i for i, name in enumerate(names)}
+    old = len(names)
+
+    # Compare every file with what was stored
+    was_present = graph["present"].tolist()
+    present = [False] * old
+    mtimes = graph["mtimes"].tolist()
+    sizes = graph["sizes"].tolist()
+    changed = []
+    for name, entry in scan_files(directory):
+        stat = entry.stat()
+        i = ids.get(name)
+        if i is None:
+            i = ids[name] = len(names)
+            names.append(name)
+            present.append(True)
+            mtimes.append(stat.st_mtime_ns)
+            sizes.append(stat.st_size)
+            changed.append(i)
             continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
-
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
+        present[i] = True
+        if (was_present[i] and mtimes[i] == stat.st_mtime_ns
+                and sizes[i] == stat.st_size):
+            continue
+        mtimes[i] = stat.st_mtime_ns
+        sizes[i] = stat.st_size
+        changed.append(i)
+    if not changed and present[:old] == was_present:
+        return False
+
+    # Parse new and modified pages, in parallel if there are many
+    parsed = map_chunks(
+        link_chunk, directory, [names[i] for i in changed],
+        processes=processes
+    )
+    links = dict(zip(changed, (
+        linked for chunk in parsed for linked in chunk
+    )))
 
-    return pages
+    # Give ids to pages linked to for the first time
+    for linked in links.values():
+        for name in linked:
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+    grow = len(names) - len(present)
+    present.extend([False] * grow)
+    mtimes.extend([0] * grow)
+    sizes.extend([0] * grow)
+
+    # Patch the rows of changed and deleted pages, keeping the others
+    rows = []
+    indptr = graph["indptr"]
+    for i in range(len(names)):
+        if i in links:
+            rows.append(np.array(sorted(ids[name] for name in links[i]),
+                                 dtype=np.int64))
+        elif i < old and present[i]:
+            rows.append(graph["indices"][indptr[i]:indptr[i + 1]])
+        else:
+            rows.append(np.zeros(0, dtype=np.int64))
+    new_indptr = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=new_indptr[1:])
+
+    save_store(store, {
+        "names": names,
+        "indptr": new_indptr,
+        "indices": np.concatenate(rows),
+        "present": np.array(present, dtype=bool),
+        "mtimes": np.array(mtimes, dtype=np.int64),
+        "sizes": np.array(sizes, dtype=np.int64),
+    })
+    return True
+
+
+def stored_edges(store):
+    """
+    Return (pages, sources, targets) for the pages present in a store,
+    in the form of `corpus_edges`.
+    """
+    graph = load_store(store)
+    present = np.asarray(graph["present"])
+    indptr = np.asarray(graph["indptr"])
+    indices = np.asarray(graph["indices"])
+    sources = np.repeat(np.arange(len(present)), np.diff(indptr))
+
+    # Keep links between present pages and renumber them
+    keep = present[sources] & present[indices]
+    ids = np.cumsum(present) - 1
+    pages = [name for name, p in zip(graph["names"], present) if p]
+    return pages, ids[sources[keep]], ids[indices[keep]]
 
 
 def transition_model(corpus, page, damping_factor):
@@ -70,15 +439,24 @@ def transition_model(corpus, page, damping_factor):
     return prob_distribution
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, processes=None, seed=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
 
+    If `processes` is given, the samples are split across that many
+    worker processes instead (see `parallel_sample_pagerank`).
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
+    if processes is not None:
+        page_ranks, _ = parallel_sample_pagerank(
+            corpus, damping_factor, n, processes, seed
+        )
+        return page_ranks
+
     # create initial sample
     current_page = random.choice(list(corpus.keys()))
     PR_chain = [current_page]
@@ -97,57 +475,740 @@ def sample_pagerank(corpus, damping_factor, n):
     print(sum(page_ranks.values()))
     return page_ranks
 
-def get_incoming_pages(corpus, current_page):
-    """
-    Return list of pages in corpus that link to current_page.
-    """
-    return [page for page in corpus if current_page in corpus[page]]
-
-def calculate_i_sum_part(corpus, page_ranks, incoming_pages):
-    """
-    Return i sum part in formula.
-    """
-    result = 0
-    for page in incoming_pages:
-        num_links = len(corpus) if len(corpus[page]) == 0 else len(corpus[page])
-        result += page_ranks[page] / num_links
-    return result
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, method="jacobi",
+                     tolerance=0.001, norm="max",
+                     max_iterations=MAX_ITERATIONS, trace=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
 
+    `method` is one of METHODS: plain "jacobi" updates, "gauss-seidel"
+    sweeps that use new values as soon as they are known, "quadratic"
+    or "aitken" extrapolation every EXTRAPOLATION_PERIOD steps, or
+    "adaptive" updates that stop recomputing pages once they have
+    converged. Iteration stops once the change between successive
+    vectors, measured in `norm` (one of NORMS), is at most `tolerance`,
+    or after `max_iterations`. If `trace` is a list, the change of each
+    iteration is appended to it.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    # STOPPING_CONDITION used to compare current changes with new changes
-    STOPPING_CONDITION = 0.001
-    # flag cont to check if STOPPING_CONDITION is satisfied
-    cont = True
-    # initialize page_ranks
-    INITIAL_POS = 1 / len(corpus)
-    page_ranks = {page : INITIAL_POS for page in corpus}
-    # loop until STOPPING_CONDITION is satisfied
-    while cont:
-        prev_PR = page_ranks.copy()
-        cont = False
-        for page in page_ranks:
-            # get incoming pages
-            incoming = get_incoming_pages(corpus, page)
-            # calculate PR(p) using given formula
-            i_sum_part = calculate_i_sum_part(corpus, prev_PR, incoming)
-            page_ranks[page] = (1-damping_factor)/len(corpus) + i_sum_part * damping_factor
-            # check STOPPING_CONDITION
-            if abs(page_ranks[page] - prev_PR[page]) > STOPPING_CONDITION:
-                cont = True
-    sum_pos = sum(page_ranks.values())
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}")
+    if norm not in NORMS:
+        raise ValueError(f"unknown norm {norm!r}")
+    pages, matrix, dangling = link_matrix(corpus)
+    solver = {
+        "jacobi": jacobi_solver,
+        "gauss-seidel": gauss_seidel_solver,
+        "quadratic": quadratic_solver,
+        "aitken": aitken_solver,
+        "adaptive": adaptive_solver,
+    }[method]
+    ranks = solver(
+        matrix, dangling, damping_factor,
+        tolerance, NORMS[norm], max_iterations, trace
+    )
     # normalize results
-    page_ranks = {page : pos/sum_pos for page,pos in page_ranks.items()}
+    page_ranks = dict(zip(pages, (ranks / ranks.sum()).tolist()))
     print(sum(page_ranks.values()))
     return page_ranks
 
 
+def jacobi_step(matrix, dangling, damping_factor, ranks):
+    """
+    Return the ranks after one PageRank update of every page.
+    """
+    return damping_factor * (matrix @ ranks) + jump_share(
+        damping_factor, ranks[dangling].sum(), len(ranks)
+    )
+
+
+def jump_share(damping_factor, dangling_rank, n):
+    """
+    Return the rank each of n pages gets from random jumps and from
+    dangling pages, given the total rank of the dangling pages.
+    """
+    return (damping_factor * dangling_rank + 1 - damping_factor) / n
+
+
+def converged(new_ranks, ranks, tolerance, norm, trace):
+    """
+    Return whether the change between two rank vectors is at most
+    `tolerance`, recording it in `trace` if that is a list.
+    """
+    residual = np.linalg.norm(new_ranks - ranks, norm)
+    if trace is not None:
+        trace.append(float(residual))
+    return residual <= tolerance
+
+
+def jacobi_solver(matrix, dangling, damping_factor, tolerance, norm,
+                  max_iterations, trace):
+    """
+    Return PageRank values computed with Jacobi updates.
+    """
+    n = matrix.shape[0]
+    ranks = np.full(n, 1 / n)
+    for _ in range(max_iterations):
+        new_ranks = jacobi_step(matrix, dangling, damping_factor, ranks)
+        done = converged(new_ranks, ranks, tolerance, norm, trace)
+        ranks = new_ranks
+        if done:
+            break
+    return ranks
+
+
+def gauss_seidel_solver(matrix, dangling, damping_factor, tolerance, norm,
+                        max_iterations, trace):
+    """
+    Return PageRank values computed with Gauss-Seidel sweeps.
+
+    Page j is updated with the new ranks of pages before it, which
+    amounts to solving a lower triangular system per sweep; the
+    triangle is factored once. The dangling share is taken from the
+    ranks at the start of each sweep, and each sweep is normalized so
+    that the ranks keep summing to 1 as in a Jacobi update.
+    """
+    n = matrix.shape[0]
+    lower = sparse.tril(matrix, -1, format="csc")
+    upper = sparse.triu(matrix, 0, format="csr")
+    solve = splu(
+        sparse.identity(n, format="csc") - damping_factor * lower,
+        permc_spec="NATURAL"
+    ).solve
+    ranks = np.full(n, 1 / n)
+    for _ in range(max_iterations):
+        new_ranks = solve(
+            damping_factor * (upper @ ranks)
+            + jump_share(damping_factor, ranks[dangling].sum(), n)
+        )
+        new_ranks /= new_ranks.sum()
+        done = converged(new_ranks, ranks, tolerance, norm, trace)
+        ranks = new_ranks
+        if done:
+            break
+    return ranks
+
+
+def quadratic_solver(matrix, dangling, damping_factor, tolerance, norm,
+                     max_iterations, trace):
+    """
+    Return PageRank values computed with Jacobi updates and periodic
+    quadratic extrapolation, which removes the two next largest
+    eigenvector components from the error using the last four
+    iterates.
+    """
+    n = matrix.shape[0]
+    ranks = np.full(n, 1 / n)
+    history = [ranks]
+    for k in range(1, max_iterations + 1):
+        new_ranks = jacobi_step(matrix, dangling, damping_factor, ranks)
+        done = converged(new_ranks, ranks, tolerance, norm, trace)
+        ranks = new_ranks
+        if done:
+            break
+        history = history[-3:] + [ranks]
+        if k % EXTRAPOLATION_PERIOD == 0 and len(history) == 4:
+            x0, x1, x2, x3 = history
+            y = np.column_stack([x1 - x0, x2 - x0])
+            (g1, g2), *_ = np.linalg.lstsq(y, x0 - x3, rcond=None)
+            ranks = (g1 + g2 + 1) * x1 + (g2 + 1) * x2 + x3
+            ranks = np.maximum(ranks, 0)
+            ranks /= ranks.sum()
+            history = [ranks]
+    return ranks
+
+
+def aitken_solver(matrix, dangling, damping_factor, tolerance, norm,
+                  max_iterations, trace):
+    """
+    Return PageRank values computed with Jacobi updates and periodic
+    Aitken extrapolation of each page from its last three iterates.
+    """
+    n = matrix.shape[0]
+    ranks = np.full(n, 1 / n)
+    history = [ranks]
+    for k in range(1, max_iterations + 1):
+        new_ranks = jacobi_step(matrix, dangling, damping_factor, ranks)
+        done = converged(new_ranks, ranks, tolerance, norm, trace)
+        ranks = new_ranks
+        if done:
+            break
+        history = history[-2:] + [ranks]
+        if k % EXTRAPOLATION_PERIOD == 0 and len(history) == 3:
+            x0, x1, x2 = history
+            step = x2 - x1
+            curve = step - (x1 - x0)
+            safe = np.abs(curve) > np.finfo(float).eps * x2
+
+            # Leave pages whose changes are not shrinking alone
+            ranks = x2.copy()
+            ranks[safe] -= step[safe] ** 2 / curve[safe]
+            ranks = np.maximum(ranks, 0)
+            ranks /= ranks.sum()
+            history = [ranks]
+    return ranks
+
+
+def adaptive_solver(matrix, dangling, damping_factor, tolerance, norm,
+                    max_iterations, trace):
+    """
+    Return PageRank values computed with Jacobi updates of only the
+    pages still changing.
+
+    A page is frozen once its change has stayed below FREEZE_RATIO of
+    its share of the tolerance for FREEZE_STEPS steps; frozen pages
+    keep passing on their last rank, and the rows of the matrix left
+    to multiply shrink with them. Once the remaining pages converge, a
+    step over every page checks the result and thaws any page that has
+    moved since.
+    """
+    n = matrix.shape[0]
+    threshold = FREEZE_RATIO * tolerance / n ** (1 / norm)
+    ranks = np.full(n, 1 / n)
+    active = np.arange(n)
+    rows = matrix
+    calm = np.zeros(n, dtype=np.int64)
+    for _ in range(max_iterations):
+        new_ranks = (
+            damping_factor * (rows @ ranks)
+            + jump_share(damping_factor, ranks[dangling].sum(), n)
+        )
+        done = converged(new_ranks, ranks[active], tolerance, norm, trace)
+        change = np.abs(new_ranks - ranks[active])
+        ranks[active] = new_ranks
+        if done and len(active) == n:
+            break
+        # Count how long each page has barely moved
+        calm = np.where(change > threshold, 0, calm + 1)
+        keep = calm < FREEZE_STEPS
+        if done or not keep.any():
+            active = np.arange(n)
+            rows = matrix
+            calm = np.zeros(n, dtype=np.int64)
+        elif not keep.all():
+            active = active[keep]
+            rows = rows[keep]
+            calm = calm[keep]
+    return ranks
+
+
+def corpus_edges(corpus):
+    """
+    Return (pages, sources, targets) for a corpus, where `pages` is
+    the sorted list of page names and each link from pages[i] to
+    pages[j] appears as i in `sources` and j at the same position in
+    `targets`.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    sources = []
+    targets = []
+    for page in pages:
+        i = index[page]
+        for link in corpus[page]:
+            sources.append(i)
+            targets.append(index[link])
+    return (
+        pages,
+        np.array(sources, dtype=np.int64),
+        np.array(targets, dtype=np.int64)
+    )
+
+
+def link_matrix(corpus):
+    """
+    Return (pages, matrix, dangling) for a corpus.
+
+    `pages` is the sorted list of page names, and page i of the list is
+    row and column i of `matrix`, a CSR matrix where entry (j, i) is the
+    probability of following a link from page i to page j. `dangling`
+    is a boolean array marking pages without links.
+    """
+    pages, sources, targets = corpus_edges(corpus)
+    return (pages,) + edge_matrix(sources, targets, len(pages))
+
+
+def edge_matrix(sources, targets, n):
+    """
+    Return (matrix, dangling) for a link graph of n pages given as
+    parallel arrays of source and target page numbers.
+    """
+    out_degree = np.bincount(sources, minlength=n)
+    weights = 1 / out_degree[sources]
+    matrix = sparse.csr_matrix(
+        (weights, (targets, sources)), shape=(n, n)
+    )
+    return matrix, out_degree == 0
+
+
+def power_iteration(matrix, dangling, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS):
+    """
+    Return the PageRank vector for a link matrix from `edge_matrix`.
+
+    A dangling page is treated as linking to every page, which adds the
+    same share of its rank to every page: a rank-one correction applied
+    without ever storing the dense matrix. Iteration stops once the L1
+    change between successive vectors is at most `tolerance`.
+    """
+    n = matrix.shape[0]
+    ranks = np.full(n, 1 / n)
+    for _ in range(max_iterations):
+        new_ranks = jacobi_step(matrix, dangling, damping_factor, ranks)
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if change <= tolerance:
+            break
+    return ranks / ranks.sum()
+
+
+def sparse_pagerank(corpus, damping_factor, tolerance=TOLERANCE):
+    """
+    Return PageRank values for each page by power iteration over a
+    sparse transition matrix, built once for the whole corpus.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    pages, matrix, dangling = link_matrix(corpus)
+    ranks = power_iteration(matrix, dangling, damping_factor, tolerance)
+    return dict(zip(pages, ranks.tolist()))
+
+
+def personalized_pagerank(corpus, damping_factor, teleport,
+                          tolerance=TOLERANCE):
+    """
+    Return (pages, ranks) with personalized PageRank values for many
+    teleport distributions at once.
+
+    `teleport` is an array of shape (len(corpus), k) whose columns
+    are distributions over the pages in sorted order, such as those
+    made by `teleport_matrix`. Column c of `ranks` holds the PageRank
+    values when the random surfer jumps according to column c instead
+    of uniformly.
+    """
+    pages, matrix, dangling = link_matrix(corpus)
+    ranks = batch_power_iteration(
+        matrix, dangling, damping_factor, teleport, tolerance
+    )
+    return pages, ranks
+
+
+def teleport_matrix(pages, seed_sets):
+    """
+    Return a teleport matrix for `personalized_pagerank` whose column c
+    is uniform over the pages in seed_sets[c].
+    """
+    index = {page: i for i, page in enumerate(pages)}
+    teleport = np.zeros((len(pages), len(seed_sets)))
+    for c, seeds in enumerate(seed_sets):
+        if not seeds:
+            raise ValueError(f"seed set {c} is empty")
+        for page in seeds:
+            teleport[index[page], c] = 1 / len(seeds)
+    return teleport
+
+
+def batch_power_iteration(matrix, dangling, damping_factor, teleport,
+                          tolerance=TOLERANCE,
+                          max_iterations=MAX_ITERATIONS):
+    """
+    Return one PageRank vector per column of `teleport` for a link
+    matrix from `edge_matrix`, as the columns of an array.
+
+    Blocks of BATCH_COLUMNS columns are updated together with one
+    sparse matrix times dense matrix product per iteration, and a
+    column stops being updated once its L1 change is at most
+    `tolerance`. The rank of dangling pages is sent back along each
+    column's own teleport distribution.
+    """
+    teleport = np.asarray(teleport, dtype=np.float64)
+    if teleport.ndim != 2 or teleport.shape[0] != matrix.shape[0]:
+        raise ValueError("teleport must have one row per page")
+    totals = teleport.sum(axis=0)
+    if (teleport < 0).any() or (totals <= 0).any():
+        raise ValueError("teleport columns must be distributions")
+    teleport = teleport / totals
+    dangling = np.flatnonzero(dangling)
+    ranks = np.empty_like(teleport)
+    for start in range(0, teleport.shape[1], BATCH_COLUMNS):
+        block = slice(start, start + BATCH_COLUMNS)
+        ranks[:, block] = power_iteration_block(
+            matrix, dangling, damping_factor,
+            np.ascontiguousarray(teleport[:, block]),
+            tolerance, max_iterations
+        )
+    return ranks
+
+
+def power_iteration_block(matrix, dangling, damping_factor, teleport,
+                          tolerance, max_iterations):
+    """
+    Return the PageRank vectors for a block of normalized teleport
+    columns, given the indices of the dangling pages.
+    """
+    # Only the columns still changing are kept in `current`, and the
+    # dense work is done in place since it costs more than the product
+    ranks = teleport.copy()
+    active = np.arange(teleport.shape[1])
+    current = ranks.copy()
+    jump = teleport
+    for _ in range(max_iterations):
+        scale = damping_factor * current[dangling].sum(axis=0)
+        scale += 1 - damping_factor
+        new_ranks = matrix @ current
+        new_ranks *= damping_factor
+        new_ranks += jump * scale
+        current -= new_ranks
+        np.abs(current, out=current)
+        change = current.sum(axis=0)
+        current = new_ranks
+        done = change <= tolerance
+        if done.any():
+            ranks[:, active] = current
+            active = active[~done]
+            current = np.ascontiguousarray(current[:, ~done])
+            jump = np.ascontiguousarray(jump[:, ~done])
+            if not len(active):
+                break
+    else:
+        ranks[:, active] = current
+    return ranks / ranks.sum(axis=0)
+
+
+def update_pagerank(corpus, damping_factor, previous, tolerance=TOLERANCE):
+    """
+    Return (page_ranks, touched, error) for a corpus whose links have
+    changed since `previous`, a dictionary of PageRank values computed
+    for it before.
+
+    The previous values are used as a starting point, and the residual
+    of the PageRank equations is pushed along links away from the
+    pages where it is large, in rounds that push every such page at
+    once, so that only pages near the changes are updated. `touched`
+    is the number of pages whose value changed, and `error` bounds the
+    L1 distance of the result from the exact PageRank values; pushing
+    stops once it is at most `tolerance`.
+    """
+    pages, matrix, dangling = link_matrix(corpus)
+
+    # Pages new to the corpus start with their share of random jumps
+    teleport = (1 - damping_factor) / len(pages)
+    ranks = np.array([previous.get(page, teleport) for page in pages])
+    ranks, touched, error = push_updates(
+        matrix, dangling, damping_factor, ranks, tolerance
+    )
+    return dict(zip(pages, ranks.tolist())), touched, error
+
+
+def push_updates(matrix, dangling, damping_factor, ranks, tolerance):
+    """
+    Return (ranks, touched, error) as in `update_pagerank`, for a link
+    matrix from `edge_matrix` and an array of starting ranks.
+    """
+    n = matrix.shape[0]
+    ranks = np.array(ranks, dtype=np.float64)
+    teleport = (1 - damping_factor) / n
+    residual = (
+        teleport - ranks + damping_factor * (matrix @ ranks)
+        + damping_factor * ranks[dangling].sum() / n
+    )
+
+    # A residual that is the same for every page, such as the one left
+    # by a change in the number of pages, only scales the solution, so
+    # it is kept aside in `shift` and removed by normalizing at the end
+    shift = np.median(residual)
+    residual -= shift
+
+    # Row i of `links` holds the share of page i's rank each page gets;
+    # residuals below `threshold` leave the error within tolerance
+    links = matrix.T.tocsr()
+    threshold = tolerance * (1 - damping_factor) / 2 / n
+    touched = np.zeros(n, dtype=bool)
+    active = np.flatnonzero(np.abs(residual) > threshold)
+    while len(active):
+
+        # Push the residual of every active page at once
+        push = residual[active]
+        ranks[active] += push
+        residual[active] = 0
+        touched[active] = True
+
+        # Dangling pages pass on their residual to every page alike
+        shift += damping_factor * push[dangling[active]].sum() / n
+
+        # Once most pages are active a full product is cheaper
+        if len(active) > n * DENSE_PUSH:
+            pushed = np.zeros(n)
+            pushed[active] = push
+            residual += damping_factor * (matrix @ pushed)
+            active = np.flatnonzero(np.abs(residual) > threshold)
+            continue
+        rows = links[active]
+        targets, inverse = np.unique(rows.indices, return_inverse=True)
+        residual[targets] += damping_factor * np.bincount(
+            inverse, rows.data * np.repeat(push, np.diff(rows.indptr)),
+            minlength=len(targets)
+        )
+        active = targets[np.abs(residual[targets]) > threshold]
+
+    # Cancelling the residual takes at most 1 / (1 - d) times as much
+    # rank, and normalizing can at most double the error, relative to
+    # the total the unnormalized solution would have
+    total = 1 - shift * n / (1 - damping_factor)
+    error = 2 * np.abs(residual).sum() / (1 - damping_factor) / total
+    return ranks / ranks.sum(), int(touched.sum()), float(error)
+
+
+def write_edge_file(path, sources, targets):
+    """
+    Write a link graph, given as parallel arrays of source and target
+    page numbers, to `path` for `out_of_core_pagerank`.
+
+    The file is a NumPy array with one (source, target) row per link,
+    sorted by source, so that it can be memory-mapped and read in
+    order.
+    """
+    order = np.lexsort((targets, sources))
+    largest = max(sources.max(initial=0), targets.max(initial=0))
+    dtype = np.int32 if largest < np.iinfo(np.int32).max else np.int64
+    edges = np.column_stack([sources[order], targets[order]]).astype(dtype)
+    with open(path, "wb") as f:
+        np.save(f, edges)
+
+
+def out_of_core_pagerank(path, n, damping_factor, tolerance=0.001,
+                         norm="max", max_iterations=MAX_ITERATIONS,
+                         trace=None, block_edges=BLOCK_EDGES):
+    """
+    Return a float32 array of PageRank values for the n pages of a
+    link graph kept in an edge file from `write_edge_file`.
+
+    The file is memory-mapped and streamed `block_edges` links at a
+    time on every iteration, so besides one block only the rank and
+    out-degree vectors are held in memory, both as float32. Iteration
+    stops as in `iterate_pagerank`, whose results it matches.
+    """
+    if norm not in NORMS:
+        raise ValueError(f"unknown norm {norm!r}")
+    edges = np.load(path, mmap_mode="r")
+    blocks = range(0, len(edges), block_edges)
+
+    # Links from one page may straddle two blocks
+    out_degree = np.zeros(n, dtype=np.float32)
+    for start in blocks:
+        block = np.asarray(edges[start:start + block_edges])
+        pages, counts = np.unique(block[:, 0], return_counts=True)
+        out_degree[pages] += counts
+
+    ranks = np.full(n, 1 / n, dtype=np.float32)
+    for _ in range(max_iterations):
+        new_ranks = np.zeros(n, dtype=np.float32)
+        for start in blocks:
+            block = np.asarray(edges[start:start + block_edges])
+            sources = block[:, 0]
+            np.add.at(
+                new_ranks, block[:, 1], ranks[sources] / out_degree[sources]
+            )
+        dangling_rank = ranks[out_degree == 0].sum(dtype=np.float64)
+        new_ranks *= damping_factor
+        new_ranks += jump_share(damping_factor, dangling_rank, n)
+        done = converged(new_ranks, ranks, tolerance, NORMS[norm], trace)
+        ranks = new_ranks
+        if done:
+            break
+    ranks /= np.float32(ranks.sum(dtype=np.float64))
+    return ranks
+
+
+def out_links(sources, targets, n):
+    """
+    Return (indptr, indices) listing the pages each page links to:
+    the links of page i are indices[indptr[i]:indptr[i + 1]].
+    """
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return indptr, targets[order]
+
+
+def surfer_counts(indptr, indices, damping_factor, n, walkers=WALKERS,
+                  rng=None, stop=None):
+    """
+    Return an array counting how often each page is visited in `n`
+    samples, taken by `walkers` random surfers moving in parallel.
+
+    Each surfer starts on a random page. At every step it follows a
+    random link with probability `damping_factor`, and otherwise (or
+    when its page has no links) jumps to a page chosen at random.
+    Surfers first walk without counting until the influence of their
+    starting page is below BURN_IN_ERROR, since with few steps per
+    surfer it would otherwise bias the counts. Once the event `stop`
+    is set, sampling ends after the current chunk of steps and the
+    counts so far are returned.
+    """
+    rng = rng or np.random.default_rng()
+    pages = len(indptr) - 1
+    degree = np.diff(indptr)
+    counts = np.zeros(pages, dtype=np.int64)
+    walkers = max(1, min(walkers, n))
+
+    # Without any links, every step is a jump to a random page
+    if not len(indices):
+        indices = np.zeros(1, dtype=np.int64)
+    last = len(indices) - 1
+
+    def step(current):
+        # Surfers on pages without links always jump
+        follow = (rng.random(walkers) < damping_factor) & (
+            degree[current] > 0
+        )
+
+        # Pick a random link of each surfer's page; the position is
+        # clipped for pages without links, whose choice is unused
+        offsets = (rng.random(walkers) * degree[current]).astype(np.int64)
+        positions = np.minimum(indptr[current] + offsets, last)
+        return np.where(
+            follow, indices[positions], rng.integers(pages, size=walkers)
+        )
+
+    current = rng.integers(pages, size=walkers)
+    if 0 < damping_factor < 1:
+        burn_in = int(np.ceil(np.log(BURN_IN_ERROR) / np.log(damping_factor)))
+        for _ in range(burn_in):
+            current = step(current)
+
+    taken = 0
+    while taken < n and not (stop is not None and stop.is_set()):
+        steps = min(STEPS_PER_CHUNK, -(-(n - taken) // walkers))
+        visits = np.empty((steps, walkers), dtype=np.int64)
+        for i in range(steps):
+            visits[i] = current
+            current = step(current)
+        visits = visits.ravel()[:n - taken]
+        counts += np.bincount(visits, minlength=pages)
+        taken += len(visits)
+    return counts
+
+
+def vectorized_sample_pagerank(corpus, damping_factor, n, walkers=WALKERS,
+                               seed=None):
+    """
+    Return PageRank values for each page by sampling `n` pages with
+    many random surfers simulated at once.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    pages, sources, targets = corpus_edges(corpus)
+    indptr, indices = out_links(sources, targets, len(pages))
+    counts = surfer_counts(
+        indptr, indices, damping_factor, n, walkers,
+        np.random.default_rng(seed)
+    )
+    return dict(zip(pages, (counts / n).tolist()))
+
+
+# Link lists shared by the batches run in one worker process, and the
+# event telling them that sampling has stopped early
+worker_links = None
+worker_stop = None
+
+
+def init_worker(indptr, indices, stop=None):
+    global worker_links, worker_stop
+    worker_links = (indptr, indices)
+    worker_stop = stop
+
+
+def sample_batch(damping_factor, n, seed_sequence):
+    """
+    Return visit counts for one independent sampling run of `n`
+    samples, in a worker set up by `init_worker`.
+    """
+    indptr, indices = worker_links
+    return surfer_counts(
+        indptr, indices, damping_factor, n,
+        rng=np.random.default_rng(seed_sequence), stop=worker_stop
+    )
+
+
+def parallel_sample_pagerank(corpus, damping_factor, n, processes=None,
+                             seed=None, max_error=None):
+    """
+    Return (page_ranks, errors) by sampling `n` pages in independent
+    runs spread across worker processes.
+
+    The samples are split into batches, each with its own random
+    stream spawned from `seed`, and the batch counts are summed. The
+    spread of the batch estimates gives each page's standard error.
+    If `max_error` is given, sampling stops as soon as every standard
+    error is at most `max_error`, possibly before all `n` samples.
+    Batches are taken in the order they were submitted, so a seeded run
+    stops at the same batch whatever the timing; batches still running
+    then are told to stop, and their counts are discarded.
+    """
+    pages, sources, targets = corpus_edges(corpus)
+    indptr, indices = out_links(sources, targets, len(pages))
+    processes = processes or os.cpu_count() or 1
+    batches = max(MIN_BATCHES, processes * BATCHES_PER_PROCESS)
+    sizes = [n // batches + (b < n % batches) for b in range(batches)]
+    streams = np.random.SeedSequence(seed).spawn(batches)
+
+    results = []
+    stop = multiprocessing.Event()
+    executor = ProcessPoolExecutor(
+        processes, initializer=init_worker, initargs=(indptr, indices, stop)
+    )
+    try:
+        futures = [
+            executor.submit(sample_batch, damping_factor, size, stream)
+            for size, stream in zip(sizes, streams) if size
+        ]
+        for future in futures:
+            results.append(future.result())
+
+            # Stop early once the estimate is precise enough
+            if (max_error is not None and len(results) >= MIN_BATCHES
+                    and batch_errors(results).max() <= max_error):
+                stop.set()
+                break
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+    counts = np.sum(results, axis=0)
+    ranks = counts / counts.sum()
+    errors = batch_errors(results)
+    return (
+        dict(zip(pages, ranks.tolist())),
+        dict(zip(pages, errors.tolist()))
+    )
+
+
+def batch_errors(results):
+    """
+    Return the standard error of the PageRank estimate for each page,
+    given the visit counts of independent sampling runs.
+    """
+    counts = np.array(results, dtype=np.float64)
+    sizes = counts.sum(axis=1, keepdims=True)
+    if len(counts) < 2:
+        return np.full(counts.shape[1], np.inf)
+
+    # Weight each run by its number of samples
+    estimates = counts / sizes
+    weights = sizes / sizes.sum()
+    mean = (weights * estimates).sum(axis=0)
+    variance = (weights * (estimates - mean) ** 2).sum(axis=0)
+    return np.sqrt(variance / (len(counts) - 1))
+
+
 if __name__ == "__main__":
     main()